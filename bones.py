@@ -10,8 +10,8 @@ def dump_skin(obj):
     print(smr.quality);
     print(smr.updateWhenOffscreen);
     mesh = smr.mesh
-    for b in mesh.boneWeights:
-        print(b.indices, b.weights, sum(b.weights))
+    for indices, weights in zip(mesh.boneIndices, mesh.boneWeights):
+        print(indices, weights, sum(weights))
 
 def check_obj(obj):
     if hasattr(obj, "skinned_mesh_renderer"):
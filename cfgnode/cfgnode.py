@@ -19,11 +19,18 @@
 
 # <pep8 compliant>
 
+import asyncio
+
 try:
     from .script import Script
 except ImportError:
     from script import Script
 
+try:
+    from ..fileio import read_file, prefetch
+except ImportError:
+    from fileio import read_file, prefetch
+
 class ConfigNodeError(Exception):
     def __init__(self, fname, line, message):
         Exception.__init__(self, "%s:%d: %s" % (fname, line, message))
@@ -102,10 +109,28 @@ class ConfigNode:
         else:
             return nodes
     @classmethod
+    def loadbytes(cls, data):
+        # bytes map straight to code points
+        return cls.load(str(data, "latin-1"))
+    @classmethod
     def loadfile(cls, path):
-        bytes = open(path, "rb").read()
-        text = "".join(map(lambda b: chr(b), bytes))
-        return cls.load(text)
+        return cls.loadbytes(read_file(path))
+    @classmethod
+    async def loadfile_async(cls, path):
+        """Load a file without blocking the event loop on the I/O."""
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, read_file, path)
+        return cls.loadbytes(data)
+    @classmethod
+    def loadfiles_async(cls, paths, workers=4, depth=8):
+        """Load files, overlapping the reading of files with their parsing.
+
+        Files are read by a pool of worker threads, at most depth files
+        ahead of the consumer. Generates (path, node) pairs in the order
+        of paths. Closing the generator cancels the pending reads.
+        """
+        return prefetch(paths, lambda path, data: cls.loadbytes(data),
+                        workers, depth)
     def GetNode(self, key):
         for n in self.nodes:
             if n.name == key:
@@ -1,6 +1,6 @@
 import sys
 
-from mu import Mu, MuObject, MuTransform, MuMesh, MuTagLayer
+from mu import Mu, MuFile, MuObject, MuTransform, MuMesh, MuTagLayer
 from multiprocessing import Pool
 
 def read_vertices(input):
@@ -67,7 +67,7 @@ extra_points = set()
 def thread_func(parms):
     name = parms
     input = Mu()
-    input.file = open(name + ".bin", "rb");
+    input.file = MuFile(open(name + ".bin", "rb"))
     verts = read_vertices(input)
     faces = read_facelist(input)
     final_faces = read_facelist(input)
@@ -33,6 +33,8 @@ def dump_thing(thing, mu, level, exclude, dump_funcs):
         if a[0] == "_" or a in ["read", "write"] or a in exclude:
             continue
         attr = getattr(thing, a)
+        if callable(attr):
+            continue
         n = attr.__class__.__name__
         if type(attr) is dict and attr:
             print(("%s%s = {" % ("    " * level, a)))
@@ -74,6 +76,7 @@ def dump_list(name, mu, lst, level):
 
 mesh_dump_funcs = {
     "list": dump_list,
+    "MuArray": dump_list,
 }
 
 def dump_mesh(name, mu, mesh, level):
@@ -82,6 +85,7 @@ def dump_mesh(name, mu, mesh, level):
 
 sharedmesh_dump_funcs = {
     "list": dump_list,
+    "MuArray": dump_list,
     "MuMesh": dump_mesh,
 }
 
@@ -116,7 +120,9 @@ def dump_key(name, mu, key, level):
 
 def dump_curve(name, mu, curve, level):
     print("%s Curve: %s = " % ("    " * level, name))
-    dump_thing(curve, mu, level, ["keys"], {})
+    # the keys are dumped individually rather than as packed columns
+    dump_thing(curve, mu, level, ["keys", "times", "values", "inTangents",
+                                  "outTangents", "tangentModes"], {})
     for i, key in enumerate(curve.keys):
         dump_key("key", mu, key, level + 1)
 
@@ -22,7 +22,8 @@
 import bpy
 from mathutils import Vector, Matrix
 
-from ..mu import MuMesh, MuRenderer, MuSkinnedMeshRenderer, MuBoneWeight
+from ..mu import MuMesh, MuRenderer, MuSkinnedMeshRenderer
+from ..mu import mu_array
 from ..utils import collect_modifiers, collect_armature_modifiers
 
 from .material import make_material
@@ -210,19 +211,19 @@ def make_mumesh(mesh, submeshes, vertex_data, vertex_map, num_verts):
         for i, t in enumerate(tangents):
             tangents[i] = tuple(t) + (bitangents[i],)
     mumesh = MuMesh()
-    mumesh.submeshes = submeshes
-    mumesh.verts = verts
+    mumesh.submeshes = [mu_array('i', 3, sm) for sm in submeshes]
+    mumesh.verts = mu_array('f', 3, verts)
     mumesh.groups = groups
     if normals[0] != None:
-        mumesh.normals = normals
+        mumesh.normals = mu_array('f', 3, normals)
     if uvs[0] != None:
-        mumesh.uvs = uvs
+        mumesh.uvs = mu_array('f', 2, uvs)
     if uv2s[0] != None:
-        mumesh.uv2s = uv2s
+        mumesh.uv2s = mu_array('f', 2, uv2s)
     if tangents[0] != None:
-        mumesh.tangents = tangents
+        mumesh.tangents = mu_array('f', 4, tangents)
     if colors[0] != None:
-        mumesh.colors = colors
+        mumesh.colors = mu_array('d', 4, colors)
     return mumesh
 
 def make_mesh(mu, obj):
@@ -278,7 +279,8 @@ def mesh_bones(obj, mumesh, armature):
         boneset.add(bone.name)
     bones = []
     boneindices = {}
-    mumesh.boneWeights = [None] * len(mumesh.verts)
+    boneIndices = [None] * len(mumesh.verts)
+    boneWeights = [None] * len(mumesh.verts)
     for grp in obj.vertex_groups:
         if grp.name in boneset:
             boneindices[grp.name] = len(bones)
@@ -297,10 +299,10 @@ def mesh_bones(obj, mumesh, armature):
             maxlen = len(weights)
         if len(weights) < 4:
             weights += [(0,0)]*(4 - len(weights))
-        bw = MuBoneWeight()
-        bw.indices = list(map(lambda w: w[0], weights))
-        bw.weights = list(map(lambda w: w[1], weights))
-        mumesh.boneWeights[i] = bw
+        boneIndices[i] = map(lambda w: w[0], weights)
+        boneWeights[i] = map(lambda w: w[1], weights)
+    mumesh.boneIndices = mu_array('i', 4, boneIndices)
+    mumesh.boneWeights = mu_array('f', 4, boneWeights)
     return bones, maxlen
 
 def make_bindPoses(smr, armature, arm_mat):
@@ -0,0 +1,103 @@
+# vim:ts=4:et
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import asyncio
+import gzip
+import lzma
+import os
+import zipfile
+
+# Files may be compressed (.gz, .xz) or be members of zip archives, given
+# as the archive's path and the member's path joined by "!/" (eg,
+# GameData/Mod.zip!/Parts/part.mu)
+def split_archive(filepath):
+    archive, sep, member = filepath.partition("!/")
+    if sep and archive.lower().endswith(".zip"):
+        return archive, member
+    return None, filepath
+
+def is_packed(filepath):
+    archive, member = split_archive(filepath)
+    return archive or filepath.lower().endswith((".gz", ".xz", ".lzma"))
+
+def open_file(filepath):
+    """Open a (possibly compressed or archived) file for reading."""
+    archive, member = split_archive(filepath)
+    if archive:
+        # the member stays readable after the archive is closed
+        with zipfile.ZipFile(archive) as archive_file:
+            return archive_file.open(member)
+    name = filepath.lower()
+    if name.endswith(".gz"):
+        return gzip.open(filepath, "rb")
+    elif name.endswith((".xz", ".lzma")):
+        return lzma.open(filepath, "rb")
+    return open(filepath, "rb")
+
+def read_file(filepath, chunk_size=1024 * 1024):
+    """Read all of a (possibly compressed or archived) file."""
+    with open_file(filepath) as file:
+        if not is_packed(filepath):
+            return file.read()
+        data = bytearray()
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return data
+            data += chunk
+
+def stat_file(filepath):
+    """Stat a file, or the archive holding it."""
+    archive, member = split_archive(filepath)
+    return os.stat(archive or filepath)
+
+async def prefetch(paths, load, workers=4, depth=8):
+    """Load files, overlapping the reading of files with their parsing.
+
+    The files' bytes are read by a pool of worker threads while the event
+    loop's thread parses already read files with load(path, data).
+    At most depth files are read ahead of the consumer (back-pressure).
+    Generates (path, result) pairs in the order of paths. Closing the
+    generator (or cancelling the task consuming it) cancels the pending
+    reads.
+    """
+    loop = asyncio.get_running_loop()
+    paths = iter(paths)
+    pending = deque()
+    executor = ThreadPoolExecutor(workers)
+    def read_ahead():
+        for path in islice(paths, depth - len(pending)):
+            future = loop.run_in_executor(executor, read_file, path)
+            pending.append((path, future))
+    try:
+        read_ahead()
+        while pending:
+            path, future = pending.popleft()
+            data = await future
+            read_ahead()
+            yield path, load(path, data)
+    finally:
+        for path, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
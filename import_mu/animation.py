@@ -21,7 +21,9 @@
 
 import bpy
 from mathutils import Vector, Quaternion
+from array import array
 from math import pi
+from operator import add, sub
 from .light import light_power
 
 #mess with the heads of 6.28... fans :P
@@ -83,36 +85,83 @@ def shader_property(obj, prop):
                 return mat, path, rnaIndex
     return None
 
+def interleave(xs, ys):
+    # pack x and y columns (any iterables) into (x, y) pairs for foreach_set
+    xs = array('f', xs)
+    ys = array('f', ys)
+    data = array('f', (0.0,)) * (len(xs) * 2)
+    data[0::2] = xs
+    data[1::2] = ys
+    return data
+
 def create_fcurve(action, curve, propmap):
     dp, ind, mult = propmap
     fps = bpy.context.scene.render.fps
+    start = bpy.context.scene.frame_start
     fc = action.fcurves.new(data_path = dp, index = ind)
-    fc.keyframe_points.add(len(curve.keys))
-    for i, key in enumerate(curve.keys):
-        x,y = key.time * fps + bpy.context.scene.frame_start, key.value * mult
-        fc.keyframe_points[i].co = x, y
-        fc.keyframe_points[i].handle_left_type = 'FREE'
-        fc.keyframe_points[i].handle_right_type = 'FREE'
-        if i > 0:
-            dist = (key.time - curve.keys[i - 1].time) / 3
-            dx, dy = dist * fps, key.tangent[0] * dist * mult
-        else:
-            dx, dy = 10, 0.0
-        fc.keyframe_points[i].handle_left = x - dx, y - dy
-        if i < len(curve.keys) - 1:
-            dist = (curve.keys[i + 1].time - key.time) / 3
-            dx, dy = dist * fps, key.tangent[1] * dist * mult
-        else:
-            dx, dy = 10, 0.0
-        fc.keyframe_points[i].handle_right = x + dx, y + dy
+    times = curve.times
+    num_keys = len(times)
+    x = [t * fps + start for t in times]
+    y = [v * mult for v in curve.values]
+    # the handles are a third of the way to the neighboring keys, with
+    # the outer handles of the first and last keys being flat
+    dist = [(t1 - t0) / 3 for t0, t1 in zip(times, times[1:])]
+    dx = [d * fps for d in dist]
+    ldy = [t * d * mult for t, d in zip(curve.inTangents[1:], dist)]
+    rdy = [t * d * mult for t, d in zip(curve.outTangents, dist)]
+    ldx = [10] + dx
+    ldy = [0.0] + ldy
+    rdx = dx + [10]
+    rdy = rdy + [0.0]
+    points = fc.keyframe_points
+    points.add(num_keys)
+    points.foreach_set("co", interleave(x, y))
+    handle_types = bpy.types.Keyframe.bl_rna.properties["handle_left_type"]
+    free = array('i', (handle_types.enum_items["FREE"].value,)) * num_keys
+    points.foreach_set("handle_left_type", free)
+    points.foreach_set("handle_right_type", free)
+    points.foreach_set("handle_left",
+                       interleave(map(sub, x, ldx), map(sub, y, ldy)))
+    points.foreach_set("handle_right",
+                       interleave(map(add, x, rdx), map(add, y, rdy)))
+    # the keys are already in time order and update leaves FREE handles
+    # where they are, so this only refreshes blender's cached curve data
+    fc.update()
     return fc
 
+def quaternion_matrix(q):
+    # the matrix form of q @ p, for quaternions p as (w, x, y, z)
+    w, x, y, z = q
+    return ((w, -x, -y, -z),
+            (x,  w, -z,  y),
+            (y,  z,  w, -x),
+            (z, -y,  x,  w))
+
+def transform_keys(fcurves, matrix, offset):
+    # Apply matrix @ (v - offset) to every key (and its handles) of a set of
+    # fcurves, where v is made of the values of the corresponding keys of
+    # each fcurve (eg, the x, y and z location curves).
+    points = [fc.keyframe_points for fc in fcurves]
+    for kval in ("co", "handle_left", "handle_right"):
+        data = []
+        for kp in points:
+            d = array('f', (0.0,)) * (len(kp) * 2)
+            kp.foreach_get(kval, d)
+            data.append(d)
+        values = [[v - o for v in d[1::2]] for d, o in zip(data, offset)]
+        for d, row, kp in zip(data, matrix, points):
+            result = [0.0] * len(values[0])
+            for m, vals in zip(row, values):
+                result = [r + m * v for r, v in zip(result, vals)]
+            d[1::2] = array('f', result)
+            kp.foreach_set(kval, d)
+
 def create_action(mu, path, clip):
     #print(clip.name)
     actions = {}
     bones = set()
     for curve in clip.curves:
-        if not curve.keys:
+        if not curve.times:
             print("Curve has no keys")
             continue
         if not curve.path:
@@ -182,17 +231,7 @@ def create_action(mu, path, clip):
                       != len(location[2].keyframe_points))):
                 print("Skipping mismatched location fcurve set")
             else:
-                for i in range(len(location[0].keyframe_points)):
-                    def transformkey(kval):
-                        xk = getattr(location[0].keyframe_points[i], kval)
-                        yk = getattr(location[1].keyframe_points[i], kval)
-                        zk = getattr(location[2].keyframe_points[i], kval)
-                        loc = Vector((xk.y, yk.y, zk.y))
-                        loc = rrot @ (loc - lloc)
-                        (xk.y, yk.y, zk.y) = loc
-                    transformkey("co")
-                    transformkey("handle_left")
-                    transformkey("handle_right")
+                transform_keys(location, rrot.to_matrix(), lloc)
         if "rotation_quaternion" in muobj.fcurves:
             rotation = muobj.fcurves["rotation_quaternion"]
             lrot = Quaternion(muobj.transform.localRotation).inverted()
@@ -206,18 +245,8 @@ def create_action(mu, path, clip):
                       != len(rotation[3].keyframe_points))):
                 print("Skipping mismatched rotation fcurve set")
             else:
-                for i in range(len(rotation[0].keyframe_points)):
-                    def rotkey(kval):
-                        wk = getattr(rotation[0].keyframe_points[i], kval)
-                        xk = getattr(rotation[1].keyframe_points[i], kval)
-                        yk = getattr(rotation[2].keyframe_points[i], kval)
-                        zk = getattr(rotation[3].keyframe_points[i], kval)
-                        q = Quaternion((wk.y, xk.y, yk.y, zk.y))
-                        q = lrot @ q
-                        (wk.y, xk.y, yk.y, zk.y) = q
-                    rotkey("co")
-                    rotkey("handle_left")
-                    rotkey("handle_right")
+                transform_keys(rotation, quaternion_matrix(lrot),
+                               (0, 0, 0, 0))
     for name in actions:
         act, obj = actions[name]
         if not obj.animation_data:
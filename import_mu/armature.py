@@ -20,7 +20,9 @@
 # <pep8 compliant>
 
 import bpy
+from itertools import count
 from mathutils import Vector, Quaternion, Matrix
+from ..mu import mu_array
 from ..utils import create_data_object, translate, scale, rotate
 
 BONE_LENGTH = 0.1
@@ -30,15 +32,24 @@ Matrix_YZ = Matrix(((1,0,0,0),
                     (0,1,0,0),
                     (0,0,0,1)))
 
-def create_vertex_groups(obj, bones, weights):
-    mesh = obj.data
+def create_vertex_groups(obj, bones, indices, weights):
     for bone in bones:
         obj.vertex_groups.new(name=bone)
-    for vind, weight in enumerate(weights):
-        for i in range(4):
-            bind, bweight = weight.indices[i], weight.weights[i]
-            if bweight != 0:
-                obj.vertex_groups[bind].add((vind,), bweight, 'ADD')
+    # Collect the vertices of each influence by bone and weight so every
+    # group gets one add per distinct weight rather than one per vertex.
+    # The indices and weights are four per vertex, so the vertex index is
+    # the position in the flat arrays divided by four.
+    influences = {}
+    binds = mu_array('i', 4, indices).data
+    bweights = mu_array('f', 4, weights).data
+    for i, bind, bweight in zip(count(), binds, bweights):
+        if bweight != 0:
+            key = bind, bweight
+            if key not in influences:
+                influences[key] = []
+            influences[key].append(i >> 2)
+    for (bind, bweight), vinds in influences.items():
+        obj.vertex_groups[bind].add(vinds, bweight, 'ADD')
 
 def create_armature_modifier(obj, name, armature):
     mod = obj.modifiers.new(name=name, type='ARMATURE')
@@ -93,10 +104,10 @@ def process_armature(armobj, rootBones):
 
 def create_bindPose(mu, muobj, skin):
     bone_names = skin.bones
-    for i in range(len(skin.mesh.bindPoses)):
-        bp = skin.mesh.bindPoses[i]
+    bindPoses = []
+    for bp in skin.mesh.bindPoses:
         bp = Matrix((bp[0:4], bp[4:8], bp[8:12], bp[12:16]))
-        skin.mesh.bindPoses[i] = Matrix_YZ @ bp @ Matrix_YZ
+        bindPoses.append(Matrix_YZ @ bp @ Matrix_YZ)
     ctx = bpy.context
     col = ctx.layer_collection.collection
     name = muobj.transform.name
@@ -108,7 +119,7 @@ def create_bindPose(mu, muobj, skin):
     bpy.ops.object.mode_set(mode='EDIT', toggle=False)
     for i, bname in enumerate(bone_names):
         bone = mu.objects[bname]
-        m = skin.mesh.bindPoses[i].inverted()
+        m = bindPoses[i].inverted()
         pb = create_bone (bone, skin.bindPose.edit_bones)
         pb.matrix = m
         bone.poseBone = pb.name
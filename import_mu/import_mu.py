@@ -199,7 +199,7 @@ def import_mu(collection, filepath, create_colliders, force_armature, force_mesh
     mu.force_armature = force_armature
     mu.force_mesh = force_mesh
     mu.collection = collection
-    if not mu.read(filepath):
+    if not mu.read(filepath, use_mmap=True):
         raise MuImportError("Mu", "Unrecognized format: magic %x version %d"
                                   % (mu.magic, mu.version))
 
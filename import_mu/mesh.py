@@ -21,8 +21,9 @@
 
 import bpy
 import bmesh
+from array import array
 
-from ..mu import MuMesh, MuSkinnedMeshRenderer
+from ..mu import MuMesh, MuSkinnedMeshRenderer, mu_array
 from ..utils import create_data_object
 
 from .armature import create_vertex_groups, create_armature_modifier
@@ -35,16 +36,22 @@ def attach_material(mesh, renderer, mu):
         mumat = mu.materials[renderer.materials[0]]
         mesh.materials.append(mumat.material)
 
+def loop_data(mesh, data, width):
+    # gather the per-vertex records into loop order
+    indices = array('i', (0,)) * len(mesh.loops)
+    mesh.loops.foreach_get("vertex_index", indices)
+    data = mu_array('f', width, data).data
+    loops = array('f', (0,)) * (len(indices) * width)
+    for k in range(width):
+        loops[k::width] = array('f', map(data[k::width].__getitem__, indices))
+    return loops
+
 def create_uvs(mu, uvs, mesh, name):
     uv_layer = mesh.uv_layers.new(name=name).data
-    for i, loop in enumerate(mesh.loops):
-        uv_layer[i].uv = uvs[loop.vertex_index]
+    uv_layer.foreach_set("uv", loop_data(mesh, uvs, 2))
 
 def create_normals(mu, normals, mesh):
-    custom_normals = [None] * len(mesh.loops)
-    for i, loop in enumerate(mesh.loops):
-        custom_normals[i] = normals[loop.vertex_index]
-    mesh.normals_split_custom_set(custom_normals)
+    mesh.normals_split_custom_set_from_vertices(list(normals))
     if hasattr(mesh, "use_auto_smooth"):
         # From blender 4.1 release notes:
         #  use_auto_smooth is removed. Face corner normals are now used
@@ -58,18 +65,38 @@ def create_colors(mu, colors, mesh):
         mesh.color_attributes.new(name, 'FLOAT_COLOR', 'POINT')
     color_layer = mesh.color_attributes.active_color
     if colors:
-        for i, c in enumerate(colors):
-            color_layer.data[i].color = c
+        data = array('f', mu_array('d', 4, colors).data)
+    else:
+        data = array('f', (1, 1, 1, 1)) * len(color_layer.data)
+    color_layer.data.foreach_set("color", data)
+
+def create_geometry(mesh, verts, submeshes):
+    # Build the mesh directly from the flat vertex and index arrays rather
+    # than going through from_pydata, which walks every vertex and face in
+    # python.
+    tris = array('i')
+    for sm in submeshes:
+        tris.extend(mu_array('i', 3, sm).data)
+    num_tris = len(tris) // 3
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", mu_array('f', 3, verts).data)
+    mesh.loops.add(len(tris))
+    mesh.loops.foreach_set("vertex_index", tris)
+    mesh.polygons.add(num_tris)
+    mesh.polygons.foreach_set("loop_start", array('i', range(0, len(tris), 3)))
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        # Blender 4.0 and later derive loop_total from loop_start
+        mesh.polygons.foreach_set("loop_total", array('i', (3,)) * num_tris)
+    mesh.update(calc_edges=True)
+    # keep the flat shading from_pydata gave
+    if hasattr(mesh, "shade_flat"):
+        mesh.shade_flat()
     else:
-        for i in range(len(color_layer.data)):
-            color_layer.data[i].color = (1,1,1,1)
+        mesh.polygons.foreach_set("use_smooth", [False] * num_tris)
 
 def create_mesh(mu, mumesh, name):
     mesh = bpy.data.meshes.new(name)
-    faces = []
-    for sm in mumesh.submeshes:
-        faces.extend(sm)
-    mesh.from_pydata(mumesh.verts, [], faces)
+    create_geometry(mesh, mumesh.verts, mumesh.submeshes)
     if mumesh.uvs:
         create_uvs(mu, mumesh.uvs, mesh, "UVMap")
     if mumesh.uv2s:
@@ -101,7 +128,8 @@ def create_skinned_mesh_component(mu, muobj, skin, name):
     create_bindPose(mu, muobj, skin)
     mesh = create_mesh(mu, skin.mesh, name)
     obj = create_data_object(mu.collection, name + ".skin", mesh, None)
-    create_vertex_groups(obj, skin.bones, skin.mesh.boneWeights)
+    create_vertex_groups(obj, skin.bones, skin.mesh.boneIndices,
+                         skin.mesh.boneWeights)
     attach_material(mesh, skin, mu)
     obj.parent = skin.bindPose_obj
     create_armature_modifier(obj, "BindPose", skin.bindPose_obj)
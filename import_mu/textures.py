@@ -20,29 +20,73 @@
 # <pep8 compliant>
 
 from struct import unpack
+from array import array
+import hashlib
 import os.path
 
 import bpy
 from mathutils import Vector
 
+from ..preferences import Preferences
+
+# byte to float lookup for converting 8 bit channels to blender pixels
+byte_floats = [i / 255.0 for i in range(256)]
+
 def load_mbm(mbmpath):
-    mbmfile = open(mbmpath, "rb")
-    header = mbmfile.read(20)
-    magic, width, height, bump, bpp = unpack("<5i", header)
-    if magic != 0x50534b03: # "\x03KSP" as little endian
-        return 0, 0, []
-    if bpp == 32:
-        pixels = mbmfile.read(width * height * 4)
-    elif bpp == 24:
-        pixels = [0, 0, 0, 255] * width * height
-        for i in range(width * height):
-            p = mbmfile.read(3)
-            l = i * 4
-            pixels[l:l+3] = list(p)
-    else:
-        return 0, 0, []
+    with open(mbmpath, "rb") as mbmfile:
+        header = mbmfile.read(20)
+        magic, width, height, bump, bpp = unpack("<5i", header)
+        if magic != 0x50534b03: # "\x03KSP" as little endian
+            return 0, 0, []
+        if bpp == 32:
+            pixels = mbmfile.read(width * height * 4)
+        elif bpp == 24:
+            rgb = mbmfile.read(width * height * 3)
+            pixels = bytearray(b"\xff") * (width * height * 4)
+            pixels[0::4] = rgb[0::3]
+            pixels[1::4] = rgb[1::3]
+            pixels[2::4] = rgb[2::3]
+        else:
+            return 0, 0, []
     return width, height, pixels
 
+def mbm_cache_path(path):
+    # Converted .mbm files are cached as .png in the directory set in the
+    # addon preferences (if any). The name is derived from the full path
+    # of the .mbm so textures with the same name in different directories
+    # do not collide.
+    cache = Preferences().TextureCache
+    if not cache:
+        return None
+    cache = bpy.path.abspath(cache)
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache, "%s-%s.png" % (name, key[:16]))
+
+def load_mbm_image(base, path):
+    # Returns the image and its first 256 pixels as 0-255 channel values,
+    # which is what the normal map check in load_image has always seen for
+    # .mbm textures.
+    cachepath = mbm_cache_path(path)
+    if (cachepath and os.path.isfile(cachepath)
+        and os.path.getmtime(cachepath) >= os.path.getmtime(path)):
+        img = bpy.data.images.load(cachepath)
+        img.name = base
+        return img, [round(p * 255) for p in img.pixels[:1024]]
+    w,h, pixels = load_mbm(path)
+    if not pixels:
+        return None, None
+    img = bpy.data.images.new(base, w, h, alpha=True)
+    img.pixels.foreach_set(array('f', map(byte_floats.__getitem__, pixels)))
+    if cachepath:
+        os.makedirs(os.path.dirname(cachepath), exist_ok=True)
+        img.filepath_raw = cachepath
+        img.file_format = 'PNG'
+        img.save()
+    else:
+        img.pack()
+    return img, list(pixels[:1024])
+
 def load_image(base, ext, path, type):
     name = base + ext
     path = os.path.join(path, name)
@@ -58,12 +102,9 @@ def load_image(base, ext, path, type):
         if base[-2:].lower() == "_n" or base[-3:].lower() == "nrm":
             type = 1
     elif ext.lower() == ".mbm":
-        w,h, pixels = load_mbm(path)
-        if not pixels:
+        img, pixels = load_mbm_image(base, path)
+        if not img:
             return False
-        img = bpy.data.images.new(base, w, h, alpha=True)
-        img.pixels[:] = map(lambda x: x / 255.0, pixels)
-        img.pack()
     img.alpha_mode = 'STRAIGHT'
     img.muimageprop.invertY = (ext.lower() == ".dds")
     img.muimageprop.convertNorm = False
@@ -1,4 +1,4 @@
-from mu import Mu
+from mu import read_many
 import sys
 
 def check_obj(obj):
@@ -11,9 +11,8 @@ def check_obj(obj):
         dirty |= check_obj(child)
     return dirty
 
-def find_lights(fname):
-    mu = Mu()
-    if not mu.read(fname):
+def find_lights(fname, mu):
+    if not mu:
         print("could not read: " + fname)
         raise
     sys.stdout.write("checking " + fname)
@@ -23,8 +22,9 @@ def find_lights(fname):
     else:
         print(" ok")
 
-for f in sys.argv[1:]:
-    try:
-        find_lights(f)
-    except:
-        pass
+if __name__ == "__main__":
+    for f, mu in zip(sys.argv[1:], read_many(sys.argv[1:])):
+        try:
+            find_lights(f, mu)
+        except:
+            pass
@@ -19,7 +19,26 @@
 
 # <pep8 compliant>
 
-from struct import pack, unpack
+from struct import Struct, unpack, unpack_from
+from array import array
+from operator import add, mul, neg, not_, sub
+from itertools import chain, islice
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import sys
+
+try:
+    from .fileio import is_packed, read_file, split_archive, stat_file
+    from .fileio import prefetch
+except ImportError:
+    from fileio import is_packed, read_file, split_archive, stat_file
+    from fileio import prefetch
 
 class MuEnum:
     MODEL_BINARY = 76543
@@ -165,6 +184,172 @@ class MuEnum:
         'TT_NORMAL_MAP':TT_NORMAL_MAP,
     }
 
+class MuLazy:
+    """Data that a lazy read skipped, to be decoded on first access.
+
+    A lazy read records the offset and size of the skipped data in _lazy
+    (see Mu.defer). Accessing any attribute that is not yet present
+    decodes the data from the file.
+    """
+    def __getattr__(self, name):
+        lazy = self.__dict__.pop("_lazy", None)
+        if lazy is None:
+            raise AttributeError(name)
+        mu, offset, size, read = lazy
+        mu.read_deferred(offset, read)
+        return getattr(self, name)
+
+# Converters between the values unpacked from a record (d, starting at
+# index i) and an attribute (v). Vectors and quaternions get the same axis
+# conversion as read_vector and read_quaternion (and their writes).
+def unpack_scalar(d, i):
+    return d[i]
+
+def unpack_float2(d, i):
+    return d[i:i + 2]
+
+def unpack_float4(d, i):
+    return d[i:i + 4]
+
+def unpack_vector(d, i):
+    return d[i], d[i + 2], d[i + 1]
+
+def unpack_quaternion(d, i):
+    return d[i + 3], -d[i], -d[i + 2], -d[i + 1]
+
+def pack_scalar(v):
+    return (v,)
+
+def pack_sequence(v):
+    return v
+
+def pack_vector(v):
+    return v[0], v[2], v[1]
+
+def pack_quaternion(q):
+    return -q[1], -q[3], -q[2], q[0]
+
+# Field kinds for fixed layout records: struct format, the number of values
+# the field unpacks to, and the converters to and from those values.
+record_kinds = {
+    "byte": ("B", 1, unpack_scalar, pack_scalar),
+    "int": ("i", 1, unpack_scalar, pack_scalar),
+    "uint": ("I", 1, unpack_scalar, pack_scalar),
+    "float": ("f", 1, unpack_scalar, pack_scalar),
+    "float2": ("2f", 2, unpack_float2, pack_sequence),
+    "float4": ("4f", 4, unpack_float4, pack_sequence),
+    "vector": ("3f", 3, unpack_vector, pack_vector),
+    "quaternion": ("4f", 4, unpack_quaternion, pack_quaternion),
+}
+
+# The fixed layout part of each record, in file order. Anything variable
+# (names, trigger flags, version dependent fields, sub-records) is still
+# handled by the record's own read and write.
+record_schemas = {
+    "MuMatTex": (
+        ("index", "int"),
+        ("scale", "float2"),
+        ("offset", "float2"),
+    ),
+    "MuTransform": (
+        ("localPosition", "vector"),
+        ("localRotation", "quaternion"),
+        ("localScale", "vector"),
+    ),
+    "MuKey": (
+        ("time", "float"),
+        ("value", "float"),
+        ("tangent", "float2"),
+        ("tangentMode", "int"),
+    ),
+    "MuColliderSphere": (
+        ("radius", "float"),
+        ("center", "vector"),
+    ),
+    "MuColliderCapsule": (
+        ("radius", "float"),
+        ("height", "float"),
+        ("direction", "int"),
+        ("center", "vector"),
+    ),
+    "MuColliderBox": (
+        ("size", "vector"),
+        ("center", "vector"),
+    ),
+    "MuColliderWheel": (
+        ("mass", "float"),
+        ("radius", "float"),
+        ("suspensionDistance", "float"),
+        ("center", "vector"),
+    ),
+    "MuSpring": (
+        ("spring", "float"),
+        ("damper", "float"),
+        ("targetPosition", "float"),
+    ),
+    "MuFriction": (
+        ("extremumSlip", "float"),
+        ("extremumValue", "float"),
+        ("asymptoteSlip", "float"),
+        ("asymptoteValue", "float"),
+        ("stiffness", "float"),
+    ),
+    "MuCamera": (
+        ("clearFlags", "int"),
+        ("backgroundColor", "float4"),
+        ("cullingMask", "uint"),
+        ("orthographic", "byte"),
+        ("fov", "float"),
+        ("near", "float"),
+        ("far", "float"),
+        ("depth", "float"),
+    ),
+    "MuLight": (
+        ("type", "int"),
+        ("intensity", "float"),
+        ("range", "float"),
+        ("color", "float4"),
+        ("cullingMask", "uint"),
+    ),
+}
+
+class MuRecord:
+    """Codec for a fixed layout record.
+
+    The whole record is read with a single unpack and written with a
+    single pack using one precompiled Struct. The unpacked values are
+    converted to the attributes (and back) by the converters of each
+    field's kind.
+    """
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        fmt = []
+        self.unpackers = []
+        self.packers = []
+        index = 0
+        for attr, kind in fields:
+            code, count, unpack_field, pack_field = record_kinds[kind]
+            fmt.append(code)
+            self.unpackers.append((attr, unpack_field, index))
+            self.packers.append((attr, pack_field))
+            index += count
+        self.struct = Struct("<" + "".join(fmt))
+        self.size = self.struct.size
+    def read(self, obj, mu):
+        d = mu.file.unpack_struct(self.struct)
+        for attr, unpack_field, index in self.unpackers:
+            setattr(obj, attr, unpack_field(d, index))
+        return obj
+    def write(self, obj, mu):
+        values = []
+        for attr, pack_field in self.packers:
+            values.extend(pack_field(getattr(obj, attr)))
+        mu.file.write(self.struct.pack(*values))
+
+mu_records = {name: MuRecord(name, fields)
+              for name, fields in record_schemas.items()}
+
 class MuTexture:
     def __init__(self):
         pass
@@ -179,18 +364,14 @@ class MuTexture:
         mu.write_int(self.type)
 
 class MuMatTex:
+    __slots__ = ("index", "scale", "offset")
     def __init__(self):
         pass
     def read(self, mu):
         #print("MuMatTex")
-        self.index = mu.read_int()
-        self.scale = mu.read_float(2)
-        self.offset = mu.read_float(2)
-        return self
+        return mu_records["MuMatTex"].read(self, mu)
     def write(self, mu):
-        mu.write_int(self.index)
-        mu.write_float(self.scale)
-        mu.write_float(self.offset)
+        mu_records["MuMatTex"].write(self, mu)
 
 def read_material4(self, mu):
     self.name = mu.read_string()
@@ -329,24 +510,22 @@ class MuMaterial:
             self.textureProperties[k].write(mu)
 
 class MuTransform:
+    __slots__ = ("name", "localPosition", "localRotation", "localScale")
     def __init__(self):
         pass
     def read(self, mu):
         #print("MuTransform")
         self.name = mu.read_string()
-        self.localPosition = mu.read_vector()
-        self.localRotation = mu.read_quaternion()
-        self.localScale = mu.read_vector()
+        mu_records["MuTransform"].read(self, mu)
         #print("   ", self.name, self.localPosition, self.localRotation,
         #      self.localScale)
         return self
     def write(self, mu):
         mu.write_string(self.name)
-        mu.write_vector(self.localPosition)
-        mu.write_quaternion(self.localRotation)
-        mu.write_vector(self.localScale)
+        mu_records["MuTransform"].write(self, mu)
 
 class MuTagLayer:
+    __slots__ = ("tag", "layer")
     def __init__(self):
         pass
     def read(self, mu):
@@ -361,26 +540,45 @@ class MuTagLayer:
         mu.write_int(self.layer)
 
 class MuKey:
+    __slots__ = ("time", "value", "tangent", "tangentMode")
     def __init__(self):
         pass
     def read(self, mu):
         #print("MuKey")
-        self.time = mu.read_float()
-        self.value = mu.read_float()
-        self.tangent = mu.read_float(2) # in, out
-        self.tangentMode = mu.read_int()
-        # editable, smooth, linear, stepped (0..3?)
-        #print("   ", self.time, self.value, self.tangent, self.tangentMode)
-        return self
+        # tangent is (in, out)
+        # tangentMode: editable, smooth, linear, stepped (0..3?)
+        return mu_records["MuKey"].read(self, mu)
     def write(self, mu):
-        mu.write_float(self.time)
-        mu.write_float(self.value)
-        mu.write_float(self.tangent)
-        mu.write_int(self.tangentMode)
+        mu_records["MuKey"].write(self, mu)
 
-class MuCurve:
+class MuCurve(MuLazy):
+    """An animation curve.
+
+    The keys are stored as packed columns: times, values, inTangents,
+    outTangents (float) and tangentModes (int). For compatibility, keys
+    is built as a list of MuKey from the columns on first access. Once
+    keys exists (accessed or assigned), it takes precedence over the
+    columns when writing.
+    """
     def __init__(self):
         pass
+    def __getattr__(self, name):
+        if name == "keys":
+            self.keys = self.make_keys()
+            return self.keys
+        return MuLazy.__getattr__(self, name)
+    def make_keys(self):
+        keys = []
+        columns = zip(self.times, self.values, self.inTangents,
+                      self.outTangents, self.tangentModes)
+        for time, value, inTangent, outTangent, tangentMode in columns:
+            key = MuKey()
+            key.time = time
+            key.value = value
+            key.tangent = inTangent, outTangent
+            key.tangentMode = tangentMode
+            keys.append(key)
+        return keys
     def read(self, mu):
         #print("MuCurve")
         self.path = mu.read_string()
@@ -402,18 +600,45 @@ class MuCurve:
         else:
             num_keys = mu.read_int()
         #print(num_keys)
-        self.keys = []
-        for i in range(num_keys):
-            self.keys.append(MuKey().read(mu))
+        if mu.lazy:
+            offset = mu.file.tell()
+            mu.file.skip(num_keys * 20)
+            mu.defer(self, offset, lambda mu: self.read_keys(mu, num_keys))
+        else:
+            self.read_keys(mu, num_keys)
         return self
+    def read_keys(self, mu, num_keys):
+        # each key is time, value, inTangent, outTangent (float) and
+        # tangentMode (int)
+        data = mu.read_array('f', num_keys * 5)
+        self.times = data[0::5]
+        self.values = data[1::5]
+        self.inTangents = data[2::5]
+        self.outTangents = data[3::5]
+        self.tangentModes = reinterpret('i', data[4::5])
     def write(self, mu):
         mu.write_string(self.path)
         mu.write_string(self.property)
         mu.write_int(self.type)
         mu.write_int(self.wrapMode)
-        mu.write_int(len(self.keys))
-        for key in self.keys:
-            key.write(mu)
+        if "keys" in self.__dict__:
+            keys = self.keys
+            data = array('f', [0.0]) * (len(keys) * 5)
+            data[0::5] = array('f', [k.time for k in keys])
+            data[1::5] = array('f', [k.value for k in keys])
+            data[2::5] = array('f', [k.tangent[0] for k in keys])
+            data[3::5] = array('f', [k.tangent[1] for k in keys])
+            modes = array('i', [k.tangentMode for k in keys])
+        else:
+            data = array('f', [0.0]) * (len(self.times) * 5)
+            data[0::5] = self.times
+            data[1::5] = self.values
+            data[2::5] = self.inTangents
+            data[3::5] = self.outTangents
+            modes = self.tangentModes
+        data[4::5] = reinterpret('f', modes)
+        mu.write_int(len(data) // 5)
+        mu.write_array(data)
 
 class MuClip:
     def __init__(self):
@@ -458,91 +683,191 @@ class MuAnimation:
         mu.write_string(self.clip)
         mu.write_byte(self.autoPlay)  #XXX is this right?
 
-class MuBoneWeight:
-    def __init__(self):
-        self.indices = []
-        self.weights = []
-    def read(self, mu):
-        for i in range(4):
-            self.indices.append(mu.read_int())
-            self.weights.append(mu.read_float())
-        return self
-    def write(self, mu):
-        for i in range(4):
-            mu.write_int(self.indices[i])
-            mu.write_float(self.weights[i])
+def swap_yz(data, width):
+    """Swap the y and z components of every record in a flat array.
+
+    Converts between Unity's LHS and Blender's RHS (either direction).
+    """
+    data[1::width], data[2::width] = data[2::width], data[1::width]
 
-class MuMesh:
+def negate_w(data, width=4):
+    data[3::width] = array(data.typecode, map(neg, data[3::width]))
+
+# vertex colors are stored as bytes but exposed as 0..1 floats
+color_byte_floats = tuple(map(lambda c: c / 255.0, range(256)))
+
+class MuArray:
+    """Fixed-width records (eg, vectors) packed into a flat typed array.
+
+    The records are visible as tuples, so a MuArray can be used wherever a
+    list of tuples was used, while bulk operations can use the flat array
+    (data) directly.
+    """
+    def __init__(self, typecode, width, data=None):
+        if data is None:
+            data = array(typecode)
+        self.width = width
+        self.data = data
+    def __len__(self):
+        return len(self.data) // self.width
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("MuArray index out of range")
+        w = self.width
+        return tuple(self.data[index * w:index * w + w])
+    def __iter__(self):
+        # zip over the same iterator produces the records without any
+        # python-level looping
+        return zip(*[iter(self.data)] * self.width)
+    def __setitem__(self, index, record):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("MuArray index out of range")
+        w = self.width
+        self.data[index * w:index * w + w] = array(self.data.typecode, record)
+    def __mul__(self, count):
+        return MuArray(self.data.typecode, self.width, self.data * count)
+    def __repr__(self):
+        return "MuArray(%r, %d, %d)" % (self.data.typecode, self.width,
+                                        len(self))
+    def append(self, record):
+        self.data.extend(array(self.data.typecode, record))
+    def extend(self, records):
+        if isinstance(records, MuArray):
+            self.data.extend(records.data)
+        else:
+            self.data.extend(array(self.data.typecode,
+                                   chain.from_iterable(records)))
+    def tolist(self):
+        return list(self)
+
+def reinterpret(typecode, data):
+    """Copy the raw contents of a typed array into an array of typecode."""
+    result = array(typecode)
+    result.frombytes(data.tobytes())
+    return result
+
+def mu_array(typecode, width, records):
+    """Pack a sequence of records (eg, a list of vectors) into a MuArray.
+
+    records that are already a suitable MuArray are returned as is.
+    """
+    if (isinstance(records, MuArray) and records.width == width
+        and records.data.typecode == typecode):
+        return records
+    return MuArray(typecode, width,
+                   array(typecode, chain.from_iterable(records)))
+
+class MuMesh(MuLazy):
+    # bytes per vertex of the per-vertex streams
+    stream_sizes = {
+        MuEnum.ET_MESH_VERTS: 12,
+        MuEnum.ET_MESH_UV: 8,
+        MuEnum.ET_MESH_UV2: 8,
+        MuEnum.ET_MESH_NORMALS: 12,
+        MuEnum.ET_MESH_TANGENTS: 16,
+        MuEnum.ET_MESH_BONE_WEIGHTS: 32,
+        MuEnum.ET_MESH_VERTEX_COLORS: 4,
+    }
+    # attribute and reader (for a given number of vertices) of the
+    # per-vertex streams. Bone weights are read as an (indices, weights)
+    # pair and go to boneIndices and boneWeights.
+    streams = {
+        MuEnum.ET_MESH_VERTS: ("verts", lambda mu, n: mu.read_vectors(n)),
+        MuEnum.ET_MESH_UV: ("uvs", lambda mu, n: mu.read_uvs(n)),
+        MuEnum.ET_MESH_UV2: ("uv2s", lambda mu, n: mu.read_uvs(n)),
+        MuEnum.ET_MESH_NORMALS: ("normals", lambda mu, n: mu.read_vectors(n)),
+        MuEnum.ET_MESH_TANGENTS: ("tangents",
+                                  lambda mu, n: mu.read_tangents(n)),
+        MuEnum.ET_MESH_BONE_WEIGHTS: ("boneWeights",
+                                      lambda mu, n: mu.read_bone_weights(n)),
+        MuEnum.ET_MESH_VERTEX_COLORS: ("colors",
+                                       lambda mu, n: mu.read_colors(n)),
+    }
     def __init__(self):
-        self.verts = []
-        self.uvs = []
-        self.uv2s = []
-        self.normals = []
-        self.tangents = []
-        self.boneWeights = []
-        self.bindPoses = []
+        self.verts = MuArray('f', 3)
+        self.uvs = MuArray('f', 2)
+        self.uv2s = MuArray('f', 2)
+        self.normals = MuArray('f', 3)
+        self.tangents = MuArray('f', 4)
+        self.boneIndices = MuArray('i', 4)
+        self.boneWeights = MuArray('f', 4)
+        self.bindPoses = MuArray('f', 16)
         self.submeshes = []
-        self.colors = []
+        self.colors = MuArray('d', 4)
     def read(self, mu):
         #print("MuMesh")
+        if mu.lazy:
+            offset = mu.file.tell()
+            self.skip(mu)
+            self.__dict__.clear()
+            mu.defer(self, offset, self.read_data)
+            return self
+        return self.read_data(mu)
+    def skip(self, mu, streams=None):
+        """Skip over the mesh data without decoding it.
+
+        Only the section headers are read: the sizes of the sections are
+        computed from the vertex count and the section types.
+
+        If streams is given, [section_type, offset] is appended to it for
+        each section, offset being the start of the section's data.
+
+        The vertex and triangle counts are left in num_verts and num_tris.
+        """
         start = mu.read_int()
         if start != MuEnum.ET_MESH_START:
-            raise
+            raise ValueError("MuMesh %x %d" % (mu.file.tell(), start))
+        num_verts, submesh_count = mu.read_int(2)
+        self.num_verts = num_verts
+        self.num_tris = 0
+        while True:
+            type = mu.read_int()
+            if type == MuEnum.ET_MESH_END:
+                break
+            if streams is not None:
+                streams.append([type, mu.file.tell()])
+            if type in self.stream_sizes:
+                mu.file.skip(num_verts * self.stream_sizes[type])
+            elif type == MuEnum.ET_MESH_BIND_POSES:
+                mu.file.skip(mu.read_int() * 64)
+            elif type == MuEnum.ET_MESH_TRIANGLES:
+                num_tris = mu.read_int()
+                self.num_tris += int(num_tris / 3)
+                mu.file.skip(num_tris * 4)
+            else:
+                raise ValueError("MuMesh %x %d" % (mu.file.tell(), type))
+        return self
+    def read_data(self, mu):
+        self.__init__()
+        start = mu.read_int()
+        if start != MuEnum.ET_MESH_START:
+            raise ValueError("MuMesh %x %d" % (mu.file.tell(), start))
         num_verts, submesh_count = mu.read_int(2)
         while True:
             type = mu.read_int()
             if type == MuEnum.ET_MESH_END:
                 break
-            elif type == MuEnum.ET_MESH_VERTS:
-                #print("    verts")
-                for i in range(num_verts):
-                    self.verts.append(mu.read_vector())
-            elif type == MuEnum.ET_MESH_UV:
-                #print("    uvs")
-                for i in range(num_verts):
-                    self.uvs.append(mu.read_float(2))
-            elif type == MuEnum.ET_MESH_UV2:
-                #print("    uv2s")
-                for i in range(num_verts):
-                    self.uv2s.append(mu.read_float(2))
-            elif type == MuEnum.ET_MESH_NORMALS:
-                #print("    normals")
-                for i in range(num_verts):
-                    self.normals.append(mu.read_vector())
-            elif type == MuEnum.ET_MESH_TANGENTS:
-                #print("    tangents")
-                for i in range(num_verts):
-                    self.tangents.append(mu.read_tangent())
             elif type == MuEnum.ET_MESH_BONE_WEIGHTS:
-                #print("    bone weights")
-                for i in range(num_verts):
-                    self.boneWeights.append(MuBoneWeight().read(mu))
+                weights = mu.read_bone_weights(num_verts)
+                self.boneIndices, self.boneWeights = weights
+            elif type in self.streams:
+                attr, read = self.streams[type]
+                setattr(self, attr, read(mu, num_verts))
             elif type == MuEnum.ET_MESH_BIND_POSES:
                 #print("    bind poses")
                 num_poses = mu.read_int()
-                for i in range(num_poses):
-                    self.bindPoses.append(mu.read_float(16))
+                self.bindPoses = mu.read_bind_poses(num_poses)
             elif type == MuEnum.ET_MESH_TRIANGLES:
                 #print("    sub mesh")
                 num_tris = mu.read_int()
-                tris = []
-                for i in range(int(num_tris / 3)):   #FIXME is this guaranteed?
-                    tri = mu.read_int(3)
-                    #reverse the triangle winding for Blender (because of the
-                    # LHS/RHS swap)
-                    #avoid putting 0 at the end of the list (Blender doesn't
-                    #like that)
-                    if not tri[0]:
-                        tri = tri[0], tri[2], tri[1]
-                    else:
-                        tri = tri[2], tri[1], tri[0]
-                    tris.append(tri)
-                self.submeshes.append(tris)
-            elif type == MuEnum.ET_MESH_VERTEX_COLORS:
-                for i in range(num_verts):
-                    colb = mu.read_byte(4)
-                    col = tuple(map (lambda c: c / 255.0, colb))
-                    self.colors.append(col)
+                #FIXME is this guaranteed?
+                self.submeshes.append(mu.read_triangles(int(num_tris / 3)))
             else:
                 raise ValueError("MuMesh %x %d" % (mu.file.tell(), type))
         return self
@@ -552,45 +877,33 @@ class MuMesh:
         mu.write_int(len(self.submeshes))
 
         mu.write_int(MuEnum.ET_MESH_VERTS)
-        for v in self.verts:
-            mu.write_vector(v)
+        mu.write_vectors(self.verts)
         if len(self.uvs) == len(self.verts):
             mu.write_int(MuEnum.ET_MESH_UV)
-            for uv in self.uvs:
-                mu.write_float(uv)
+            mu.write_uvs(self.uvs)
         if len(self.uv2s) == len(self.verts):
             mu.write_int(MuEnum.ET_MESH_UV2)
-            for uv in self.uv2s:
-                mu.write_float(uv)
+            mu.write_uvs(self.uv2s)
         if len(self.normals) == len(self.verts):
             mu.write_int(MuEnum.ET_MESH_NORMALS)
-            for n in self.normals:
-                mu.write_vector(n)
+            mu.write_vectors(self.normals)
         if len(self.tangents) == len(self.verts):
             mu.write_int(MuEnum.ET_MESH_TANGENTS)
-            for t in self.tangents:
-                mu.write_tangent(t)
+            mu.write_tangents(self.tangents)
         if len(self.boneWeights) == len(self.verts):
             mu.write_int(MuEnum.ET_MESH_BONE_WEIGHTS)
-            for bw in self.boneWeights:
-                bw.write(mu)
+            mu.write_bone_weights(self.boneIndices, self.boneWeights)
         if len(self.bindPoses):
             mu.write_int(MuEnum.ET_MESH_BIND_POSES)
             mu.write_int(len(self.bindPoses))
-            for bp in self.bindPoses:
-                mu.write_float(bp)
+            mu.write_bind_poses(self.bindPoses)
         if len(self.colors) == len(self.verts):
             mu.write_int(MuEnum.ET_MESH_VERTEX_COLORS)
-            for t in self.colors:
-                mu.write_color(t)
+            mu.write_colors(self.colors)
         for sm in self.submeshes:
             mu.write_int(MuEnum.ET_MESH_TRIANGLES)
             mu.write_int(len(sm) * 3)
-            for tri in sm:
-                #reverse the triangle winding for Blender (because of the
-                # LHS/RHS swap)
-                tri = tri[0], tri[2], tri[1]
-                mu.write_int(tri)
+            mu.write_triangles(sm)
         mu.write_int(MuEnum.ET_MESH_END)
 
 class MuRenderer:
@@ -617,6 +930,10 @@ class MuSkinnedMeshRenderer:
         self.materials = []
         self.bones = []
     def read(self, mu):
+        self.read_header(mu)
+        self.mesh = MuMesh().read(mu)
+        return self
+    def read_header(self, mu):
         num_mat = mu.read_int()
         for i in range(num_mat):
             self.materials.append(mu.read_int())
@@ -627,7 +944,6 @@ class MuSkinnedMeshRenderer:
         nBones = mu.read_int()
         for i in range(nBones):
             self.bones.append(mu.read_string())
-        self.mesh = MuMesh().read(mu)
         return self
     def write(self, mu):
         mu.write_int(MuEnum.ET_SKINNED_MESH_RENDERER)
@@ -643,18 +959,24 @@ class MuSkinnedMeshRenderer:
         self.mesh.write(mu)
 
 class MuCollider_Base:
+    __slots__ = ("has_trigger", "isTrigger")
     def __init__(self, has_trigger):
         self.has_trigger = has_trigger
+        self.isTrigger = 0
 
 class MuColliderMesh(MuCollider_Base):
+    __slots__ = ("convex", "mesh")
     def read(self, mu):
         #print("MuColliderMesh", self.has_trigger)
+        self.read_header(mu)
+        self.mesh = MuMesh().read(mu)
+        #print(self.isTrigger, self.convex)
+        return self
+    def read_header(self, mu):
         self.isTrigger = 0
         if self.has_trigger:
             self.isTrigger = mu.read_byte()
         self.convex = mu.read_byte()
-        self.mesh = MuMesh().read(mu)
-        #print(self.isTrigger, self.convex)
         return self
     def write(self, mu):
         if self.has_trigger:
@@ -666,114 +988,87 @@ class MuColliderMesh(MuCollider_Base):
         self.mesh.write(mu)
 
 class MuColliderSphere(MuCollider_Base):
+    __slots__ = ("radius", "center")
     def read(self, mu):
         #print("MuColliderSphere", self.has_trigger)
         self.isTrigger = 0
         if self.has_trigger:
             self.isTrigger = mu.read_byte()
-        self.radius = mu.read_float()
-        self.center = mu.read_vector()
-        #print(self.isTrigger, self.radius, self.center)
-        return self
+        return mu_records["MuColliderSphere"].read(self, mu)
     def write(self, mu):
         if self.has_trigger:
             mu.write_int(MuEnum.ET_SPHERE_COLLIDER2)
             mu.write_byte(self.isTrigger)
         else:
             mu.write_int(MuEnum.ET_SPHERE_COLLIDER)
-        mu.write_float(self.radius)
-        mu.write_vector(self.center)
+        mu_records["MuColliderSphere"].write(self, mu)
 
 class MuColliderCapsule(MuCollider_Base):
+    __slots__ = ("radius", "height", "direction", "center")
     def read(self, mu):
         #print("MuColliderCapsule", self.has_trigger)
         self.isTrigger = 0
         if self.has_trigger:
             self.isTrigger = mu.read_byte()
-        self.radius = mu.read_float()
-        self.height = mu.read_float()
-        self.direction = mu.read_int()
-        self.center = mu.read_vector()
-        return self
+        return mu_records["MuColliderCapsule"].read(self, mu)
     def write(self, mu):
         if self.has_trigger:
             mu.write_int(MuEnum.ET_CAPSULE_COLLIDER2)
             mu.write_byte(self.isTrigger)
         else:
             mu.write_int(MuEnum.ET_CAPSULE_COLLIDER)
-        mu.write_float(self.radius)
-        mu.write_float(self.height)
-        mu.write_int(self.direction)
-        mu.write_vector(self.center)
+        mu_records["MuColliderCapsule"].write(self, mu)
 
 class MuColliderBox(MuCollider_Base):
+    __slots__ = ("size", "center")
     def read(self, mu):
         #print("MuColliderBox", self.has_trigger)
         self.isTrigger = 0
         if self.has_trigger:
             self.isTrigger = mu.read_byte()
-        self.size = mu.read_vector()
-        self.center = mu.read_vector()
-        #print(self.isTrigger, self.size, self.center)
-        return self
+        return mu_records["MuColliderBox"].read(self, mu)
     def write(self, mu):
         if self.has_trigger:
             mu.write_int(MuEnum.ET_BOX_COLLIDER2)
             mu.write_byte(self.isTrigger)
         else:
             mu.write_int(MuEnum.ET_BOX_COLLIDER)
-        mu.write_vector(self.size)
-        mu.write_vector(self.center)
+        mu_records["MuColliderBox"].write(self, mu)
 
 class MuSpring:
+    __slots__ = ("spring", "damper", "targetPosition")
     def __init__(self):
         pass
     def read(self, mu):
-        self.spring = mu.read_float()
-        self.damper = mu.read_float()
-        self.targetPosition = mu.read_float()
-        return self
+        return mu_records["MuSpring"].read(self, mu)
     def write(self, mu):
-        mu.write_float(self.spring)
-        mu.write_float(self.damper)
-        mu.write_float(self.targetPosition)
+        mu_records["MuSpring"].write(self, mu)
 
 class MuFriction:
+    __slots__ = ("extremumSlip", "extremumValue", "asymptoteSlip",
+                 "asymptoteValue", "stiffness")
     def __init__(self):
         pass
     def read(self, mu):
-        self.extremumSlip = mu.read_float()
-        self.extremumValue = mu.read_float()
-        self.asymptoteSlip = mu.read_float()
-        self.asymptoteValue = mu.read_float()
-        self.stiffness = mu.read_float()
-        return self
+        return mu_records["MuFriction"].read(self, mu)
     def write(self, mu):
-        mu.write_float(self.extremumSlip)
-        mu.write_float(self.extremumValue)
-        mu.write_float(self.asymptoteSlip)
-        mu.write_float(self.asymptoteValue)
-        mu.write_float(self.stiffness)
+        mu_records["MuFriction"].write(self, mu)
 
 class MuColliderWheel(MuCollider_Base):
+    __slots__ = ("mass", "radius", "suspensionDistance", "center",
+                 "suspensionSpring", "forwardFriction", "sidewaysFriction")
     def __init__(self):
         MuCollider_Base.__init__(self, 0)
     def read(self, mu):
         #print("MuColliderWheel")
-        self.mass = mu.read_float()
-        self.radius = mu.read_float()
-        self.suspensionDistance = mu.read_float()
-        self.center = mu.read_vector()
+        mu_records["MuColliderWheel"].read(self, mu)
         self.suspensionSpring = MuSpring().read(mu)
         self.forwardFriction = MuFriction().read(mu)
         self.sidewaysFriction = MuFriction().read(mu)
         return self
     def write(self, mu):
         mu.write_int(MuEnum.ET_WHEEL_COLLIDER)
-        mu.write_float(self.mass)
-        mu.write_float(self.radius)
-        mu.write_float(self.suspensionDistance)
-        mu.write_vector(self.center)
+        mu_records["MuColliderWheel"].write(self, mu)
         self.suspensionSpring.write(mu)
         self.forwardFriction.write(mu)
         self.sidewaysFriction.write(mu)
@@ -796,25 +1091,10 @@ class MuCamera:
     def __init__(self):
         pass
     def read(self, mu):
-        self.clearFlags = mu.read_int()
-        self.backgroundColor = mu.read_float(4)
-        self.cullingMask = mu.read_uint()
-        self.orthographic = mu.read_byte()
-        self.fov = mu.read_float()
-        self.near = mu.read_float()
-        self.far = mu.read_float()
-        self.depth = mu.read_float()
-        return self
+        return mu_records["MuCamera"].read(self, mu)
     def write(self, mu):
         mu.write_int(MuEnum.ET_CAMERA)
-        mu.write_int(self.clearFlags)
-        mu.write_float(self.backgroundColor)
-        mu.write_uint(self.cullingMask)
-        mu.write_byte(self.orthographic)
-        mu.write_float(self.fov)
-        mu.write_float(self.near)
-        mu.write_float(self.far)
-        mu.write_float(self.depth)
+        mu_records["MuCamera"].write(self, mu)
 
 class MuParticles:
     def __init__(self):
@@ -896,23 +1176,27 @@ class MuLight:
     def __init__(self):
         pass
     def read(self, mu):
-        self.type = mu.read_int()
-        self.intensity = mu.read_float()
-        self.range = mu.read_float()
-        self.color = mu.read_float(4)
-        self.cullingMask = mu.read_uint()
+        mu_records["MuLight"].read(self, mu)
         if mu.version > 1:
             self.spotAngle = mu.read_float()
         return self
     def write(self, mu):
         mu.write_int(MuEnum.ET_LIGHT)
-        mu.write_int(self.type)
-        mu.write_float(self.intensity)
-        mu.write_float(self.range)
-        mu.write_float(self.color)
-        mu.write_uint(self.cullingMask)
+        mu_records["MuLight"].write(self, mu)
         mu.write_float(self.spotAngle)
 
+collider_types = (
+    MuEnum.ET_MESH_COLLIDER,
+    MuEnum.ET_SPHERE_COLLIDER,
+    MuEnum.ET_CAPSULE_COLLIDER,
+    MuEnum.ET_BOX_COLLIDER,
+    MuEnum.ET_MESH_COLLIDER2,
+    MuEnum.ET_SPHERE_COLLIDER2,
+    MuEnum.ET_CAPSULE_COLLIDER2,
+    MuEnum.ET_BOX_COLLIDER2,
+    MuEnum.ET_WHEEL_COLLIDER,
+)
+
 class MuObject:
     def __init__(self, name=""):
         self.name = name
@@ -933,15 +1217,7 @@ class MuObject:
                 break
             elif entry_type == MuEnum.ET_TAG_AND_LAYER:
                 self.tag_and_layer = MuTagLayer().read(mu)
-            elif entry_type in [MuEnum.ET_MESH_COLLIDER,
-                                MuEnum.ET_SPHERE_COLLIDER,
-                                MuEnum.ET_CAPSULE_COLLIDER,
-                                MuEnum.ET_BOX_COLLIDER,
-                                MuEnum.ET_MESH_COLLIDER2,
-                                MuEnum.ET_SPHERE_COLLIDER2,
-                                MuEnum.ET_CAPSULE_COLLIDER2,
-                                MuEnum.ET_BOX_COLLIDER2,
-                                MuEnum.ET_WHEEL_COLLIDER]:
+            elif entry_type in collider_types:
                 self.collider = MuCollider(entry_type).read(mu)
                 self.components.append(self.collider)
             elif entry_type == MuEnum.ET_MESH_FILTER:
@@ -1001,6 +1277,220 @@ class MuObject:
             child.write(mu)
             mu.write_int(MuEnum.ET_CHILD_TRANSFORM_END)
 
+# components in the order MuObject writes them
+object_components = (
+    "collider",
+    "shared_mesh",
+    "renderer",
+    "skinned_mesh_renderer",
+    "animation",
+    "camera",
+    "light",
+)
+
+def encode(thing):
+    """The canonical binary encoding of thing (as written to .mu files)."""
+    mu = Mu()
+    mu.file = MuBuffer()
+    thing.write(mu)
+    return mu.file.data
+
+# Structural (sha1) hash of a Mu, MuObject or record: equal subtrees hash
+# equal. With cache, reuse hashes stored on the objects by earlier calls;
+# they go stale if the tree is modified.
+def content_hash(thing, cache=False):
+    digest = None
+    if cache and hasattr(thing, "__dict__"):
+        digest = thing.__dict__.get("_content_hash")
+    if digest is not None:
+        return digest
+    if isinstance(thing, Mu):
+        digest = hash_parts(b"Mu", thing.name.encode(),
+                            content_hash(thing.obj, cache),
+                            *[content_hash(m, cache) for m in thing.materials],
+                            b"textures",
+                            *[content_hash(t, cache) for t in thing.textures])
+    elif isinstance(thing, MuObject):
+        parts = [b"MuObject", content_hash(thing.transform, cache)]
+        if hasattr(thing, "tag_and_layer"):
+            parts.append(content_hash(thing.tag_and_layer, cache))
+        for attr in object_components:
+            component = getattr(thing, attr, None)
+            if component is not None:
+                parts.append(attr.encode())
+                parts.append(content_hash(component, cache))
+        for child in thing.children:
+            parts.append(content_hash(child, cache))
+        digest = hash_parts(*parts)
+    else:
+        digest = hashlib.sha1(encode(thing)).digest()
+    if hasattr(thing, "__dict__"):
+        thing._content_hash = digest
+    return digest
+
+def hash_parts(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        # length prefixed so the parts cannot run into each other
+        h.update(len(part).to_bytes(4, "little"))
+        h.update(part)
+    return h.digest()
+
+# Mu.parse events: tuples of the kind followed by its data
+#   TRANSFORM_START/END: transform, depth
+#   COMPONENT: entry_type, component (without its mesh, which follows as
+#              MESH_START num_verts submesh_count, MESH_STREAM section_type
+#              first data..., MESH_END)
+#   MATERIAL/TEXTURE: index, item
+class MuEvent:
+    TRANSFORM_START = 0
+    TRANSFORM_END = 1
+    COMPONENT = 2
+    MESH_START = 3
+    MESH_STREAM = 4
+    MESH_END = 5
+    MATERIAL = 6
+    TEXTURE = 7
+
+# Table of contents of a .mu file: offsets of each object's transform and
+# components (by object path), mesh sections, animation clips and the
+# material and texture tables. Saved as JSON in a .idx sidecar file.
+class MuIndex:
+    def __init__(self):
+        self.objects = {}
+        self.materials = None
+        self.textures = None
+    def stat(self, filepath):
+        st = stat_file(filepath)
+        return st.st_size, st.st_mtime
+    def valid(self, filepath):
+        return (self.size, self.mtime) == self.stat(filepath)
+    def build(self, filepath, use_mmap=False):
+        """Scan the .mu file, skipping mesh data and animation keys."""
+        self.size, self.mtime = self.stat(filepath)
+        mu = Mu()
+        mu.file = mu.open(filepath, use_mmap)
+        mu.lazy = True
+        try:
+            mu.magic, mu.version = mu.read_int(2)
+            if (mu.magic != MuEnum.MODEL_BINARY or mu.version < 0
+                or mu.version > MuEnum.FILE_VERSION):
+                return None
+            self.version = mu.version
+            self.name = mu.read_string()
+            self.scan_object(mu, [])
+        finally:
+            mu.file.close()
+            del mu.file
+        return self
+    def scan_object(self, mu, parent_names):
+        offset = mu.file.tell()
+        transform = MuTransform().read(mu)
+        parent_names.append(transform.name)
+        components = []
+        path = "/".join(parent_names)
+        if path not in self.objects:
+            self.objects[path] = {
+                "transform": offset,
+                "components": components,
+            }
+        while True:
+            try:
+                entry_type = mu.read_int()
+            except EOFError:
+                break
+            if entry_type == MuEnum.ET_CHILD_TRANSFORM_START:
+                self.scan_object(mu, parent_names)
+            elif entry_type == MuEnum.ET_CHILD_TRANSFORM_END:
+                break
+            elif entry_type == MuEnum.ET_MATERIALS:
+                self.materials = mu.file.tell()
+                for i in range(mu.read_int()):
+                    MuMaterial().read(mu)
+            elif entry_type == MuEnum.ET_TEXTURES:
+                self.textures = mu.file.tell()
+                for i in range(mu.read_int()):
+                    MuTexture().read(mu)
+            else:
+                components.append(self.scan_component(mu, entry_type))
+        parent_names.pop()
+    def scan_component(self, mu, entry_type):
+        component = {"type": entry_type, "offset": mu.file.tell()}
+        if entry_type == MuEnum.ET_TAG_AND_LAYER:
+            MuTagLayer().read(mu)
+        elif entry_type in [MuEnum.ET_MESH_COLLIDER,
+                            MuEnum.ET_MESH_COLLIDER2]:
+            MuCollider(entry_type).read_header(mu)
+            self.scan_mesh(mu, component)
+        elif entry_type in collider_types:
+            MuCollider(entry_type).read(mu)
+        elif entry_type == MuEnum.ET_MESH_FILTER:
+            self.scan_mesh(mu, component)
+        elif entry_type == MuEnum.ET_MESH_RENDERER:
+            MuRenderer().read(mu)
+        elif entry_type == MuEnum.ET_SKINNED_MESH_RENDERER:
+            MuSkinnedMeshRenderer().read_header(mu)
+            self.scan_mesh(mu, component)
+        elif entry_type == MuEnum.ET_ANIMATION:
+            clips = component["clips"] = {}
+            for i in range(mu.read_int()):
+                offset = mu.file.tell()
+                clip = MuClip().read(mu)
+                clips.setdefault(clip.name, offset)
+            mu.read_string()
+            mu.read_byte()
+        elif entry_type == MuEnum.ET_CAMERA:
+            MuCamera().read(mu)
+        elif entry_type == MuEnum.ET_PARTICLES:
+            MuParticles().read(mu)
+        elif entry_type == MuEnum.ET_LIGHT:
+            MuLight().read(mu)
+        return component
+    def scan_mesh(self, mu, component):
+        streams = []
+        mesh = MuMesh().skip(mu, streams)
+        component["streams"] = streams
+        component["vertices"] = mesh.num_verts
+        component["triangles"] = mesh.num_tris
+    def read(self, filepath):
+        with open(filepath, "rt") as file:
+            data = json.load(file)
+        self.__dict__.update(data)
+        return self
+    def write(self, filepath):
+        with open(filepath, "wt") as file:
+            json.dump(self.__dict__, file)
+
+# indices of .mu files built or loaded this session, by absolute path
+mu_indices = {}
+
+# Get a valid index for a .mu file (None if it is not one), from memory,
+# the sidecar file or by scanning the file.
+def mu_index(filepath, sidecar=False):
+    filepath = os.path.abspath(filepath)
+    index = mu_indices.get(filepath)
+    if index and index.valid(filepath):
+        return index
+    idxpath = None
+    if not split_archive(filepath)[0]:
+        idxpath = filepath + ".idx"
+    index = None
+    if idxpath and os.path.exists(idxpath):
+        try:
+            index = MuIndex().read(idxpath)
+        except (ValueError, OSError):
+            index = None
+        if index and not index.valid(filepath):
+            index = None
+    if not index:
+        index = MuIndex().build(filepath)
+        if not index:
+            return None
+        if sidecar and idxpath:
+            index.write(idxpath)
+    mu_indices[filepath] = index
+    return index
+
 def bound(mi, x, ma):
     if x < mi:
         return mi
@@ -1008,38 +1498,253 @@ def bound(mi, x, ma):
         return ma
     return x
 
-class Mu:
+class MuFile:
+    """Reader backend pulling data from a regular file object."""
+    def __init__(self, file):
+        self.file = file
 
-    def read_byte(self, count=1, force_list=False):
-        size = 1 * count
+    def read(self, size):
         data = self.file.read(size)
         if len(data) < size:
             raise EOFError
-        data = unpack("<%dB" % count, data)
+        return data
+
+    def unpack(self, fmt, size):
+        return unpack(fmt, self.read(size))
+
+    def unpack_struct(self, s):
+        return s.unpack(self.read(s.size))
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, offset):
+        self.file.seek(offset)
+
+    def skip(self, size):
+        self.file.seek(size, 1)
+
+    def close(self):
+        self.file.close()
+
+class MuMap:
+    """Reader backend parsing straight out of a memory mapped file.
+
+    Data is unpacked in place from the mapping, and read() returns views
+    into the mapping rather than copies. As the mapping cannot be closed
+    while views exist, the views must not outlive the read.
+    """
+    def __init__(self, filepath):
+        self.file = open(filepath, "rb")
+        self.offset = 0
+        self.map = None
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file: mmap refuses to map zero bytes
+            self.buffer = memoryview(b"")
+        else:
+            self.buffer = memoryview(self.map)
+
+    def read(self, size):
+        offset = self.offset
+        if offset + size > len(self.buffer):
+            raise EOFError
+        self.offset = offset + size
+        return self.buffer[offset:offset + size]
+
+    def unpack(self, fmt, size):
+        offset = self.offset
+        if offset + size > len(self.buffer):
+            raise EOFError
+        self.offset = offset + size
+        return unpack_from(fmt, self.buffer, offset)
+
+    def unpack_struct(self, s):
+        offset = self.offset
+        if offset + s.size > len(self.buffer):
+            raise EOFError
+        self.offset = offset + s.size
+        return s.unpack_from(self.buffer, offset)
+
+    def tell(self):
+        return self.offset
+
+    def seek(self, offset):
+        self.offset = offset
+
+    def skip(self, size):
+        self.offset += size
+
+    def close(self):
+        self.buffer.release()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+class MuBytes(MuMap):
+    """Reader backend parsing straight out of data already in memory."""
+    def __init__(self, data):
+        self.file = None
+        self.map = None
+        self.offset = 0
+        self.buffer = memoryview(data)
+
+    def close(self):
+        self.buffer.release()
+
+class MuBuffer:
+    """Writer backend collecting the output in memory.
+
+    Mu.write writes the whole buffer to disk in one go once the model has
+    been serialized.
+    """
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    def tell(self):
+        return len(self.data)
+
+# precompiled structs for the primitive writes, by type code and count
+mu_structs = {}
+
+def mu_struct(code, count):
+    s = mu_structs.get((code, count))
+    if s is None:
+        s = mu_structs[code, count] = Struct("<%d%s" % (count, code))
+    return s
+
+# On-disk cache of decoded models, one pickle per .mu file, dropped when the
+# .mu file's size or mtime changes, least recently used evicted past
+# max_size bytes. Loading a pickle can run arbitrary code, so the cache
+# directory must be trusted (ie, not writable by others).
+class MuCache:
+    # the attributes of Mu that make up the decoded model
+    model_state = ("magic", "version", "name", "obj", "materials",
+                   "textures")
+    # bump when the cached classes change in a way old pickles can't load
+    format = 1
+    def __init__(self, directory, max_size=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+    def entry_path(self, filepath):
+        # pickles refer to classes by module, and the module is "mu" for the
+        # scripts but a package member in the addon: keep their entries apart
+        key = "%d:%s:%s" % (self.format, __name__, os.path.abspath(filepath))
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, name + ".mu.cache")
+    def stat(self, filepath):
+        st = stat_file(filepath)
+        return st.st_size, st.st_mtime_ns
+    def get(self, filepath):
+        """Return the cached model state for filepath (a dict), or None."""
+        path = self.entry_path(filepath)
+        try:
+            file = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            with file:
+                key, state = pickle.load(file)
+        except Exception:
+            # corrupt, or written by an incompatible version of the classes
+            self.remove(path)
+            return None
+        if key != self.stat(filepath):
+            self.invalidate(filepath)
+            return None
+        # mark as recently used
+        os.utime(path)
+        return state
+    def put(self, filepath, mu):
+        path = self.entry_path(filepath)
+        temp = path + ".tmp"
+        state = {k: getattr(mu, k) for k in self.model_state}
+        try:
+            with open(temp, "wb") as file:
+                pickle.dump((self.stat(filepath), state), file,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except BaseException:
+            self.remove(temp)
+            raise
+        self.evict()
+    def entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".mu.cache"):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+    def evict(self):
+        entries = self.entries()
+        entries.sort()
+        size = sum(e[1] for e in entries)
+        for mtime, esize, path in entries:
+            if size <= self.max_size:
+                break
+            self.remove(path)
+            size -= esize
+    def remove(self, path):
+        # another process may have beaten us to it
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    def invalidate(self, filepath):
+        """Drop the cached model for filepath, if any."""
+        self.remove(self.entry_path(filepath))
+    def clear(self):
+        """Drop all cached models."""
+        for mtime, size, path in self.entries():
+            self.remove(path)
+
+# the cache used by Mu.read, if any
+mu_cache = None
+
+def enable_cache(directory, max_size=256 * 1024 * 1024):
+    """Make Mu.read use (and fill) an on-disk cache of decoded models."""
+    global mu_cache
+    mu_cache = MuCache(directory, max_size)
+    return mu_cache
+
+def disable_cache():
+    global mu_cache
+    mu_cache = None
+
+class Mu:
+
+    def read_byte(self, count=1, force_list=False):
+        data = self.file.unpack("<%dB" % count, count)
         if count == 1 and not force_list:
             return data[0]
         return data
 
     def read_int(self, count=1, force_list=False):
-        size = 4 * count
-        data = self.file.read(size)
-        if len(data) < size:
-            raise EOFError
-        data = unpack("<%di" % count, data)
+        data = self.file.unpack("<%di" % count, 4 * count)
         if count == 1 and not force_list:
             return data[0]
         return data
 
     def read_7int(self, count=1, force_list=False):
+        read = self.file.read
         def readval():
             val = 0
-            mult = 1
+            shift = 0
             while True:
-                valb = self.read_byte()
-                val += (valb & 127) * mult
+                valb = read(1)[0]
+                val |= (valb & 127) << shift
                 if valb < 128:
                     break
-                mult *= 128
+                shift += 7
             return val
         if count == 1 and not force_list:
             return readval()
@@ -1049,21 +1754,13 @@ class Mu:
         return vals
 
     def read_uint(self, count=1, force_list=False):
-        size = 4 * count
-        data = self.file.read(size)
-        if len(data) < size:
-            raise EOFError
-        data = unpack("<%dI" % count, data)
+        data = self.file.unpack("<%dI" % count, 4 * count)
         if count == 1 and not force_list:
             return data[0]
         return data
 
     def read_float(self, count=1, force_list=False):
-        size = 4 * count
-        data = self.file.read(size)
-        if len(data) < size:
-            raise EOFError
-        data = unpack("<%df" % count, data)
+        data = self.file.unpack("<%df" % count, 4 * count)
         if count == 1 and not force_list:
             return data[0]
         return data
@@ -1087,57 +1784,114 @@ class Mu:
         t = t[0], t[2], t[1], -t[3]
         return t
 
-    def read_bytes(self, size):
-        data = self.file.read(size)
-        if len(data) < size:
-            raise EOFError
+    def read_array(self, typecode, count):
+        data = array(typecode)
+        data.frombytes(self.file.read(data.itemsize * count))
+        if sys.byteorder != "little":
+            data.byteswap()
         return data
 
+    def read_vectors(self, count):
+        data = self.read_array('f', count * 3)
+        #convert from Unity's LHS to Blender's RHS
+        swap_yz(data, 3)
+        return MuArray('f', 3, data)
+
+    def read_uvs(self, count):
+        return MuArray('f', 2, self.read_array('f', count * 2))
+
+    def read_tangents(self, count):
+        data = self.read_array('f', count * 4)
+        swap_yz(data, 4)
+        negate_w(data, 4)
+        return MuArray('f', 4, data)
+
+    def read_colors(self, count):
+        data = self.read_array('B', count * 4)
+        # doubles so the colors are exactly c/255 as they always were
+        data = array('d', map(color_byte_floats.__getitem__, data))
+        return MuArray('d', 4, data)
+
+    def read_bone_weights(self, count):
+        # four interleaved bone index (int) and weight (float) pairs per
+        # vertex
+        data = self.read_array('i', count * 8)
+        indices = MuArray('i', 4, data[0::2])
+        weights = MuArray('f', 4, reinterpret('f', data[1::2]))
+        return indices, weights
+
+    def read_bind_poses(self, count):
+        return MuArray('f', 16, self.read_array('f', count * 16))
+
+    def read_triangles(self, count):
+        tris = self.read_array('i', count * 3)
+        first = tris[0::3]
+        #reverse the triangle winding for Blender (because of the
+        # LHS/RHS swap)
+        if 0 not in first:
+            tris[0::3] = tris[2::3]
+            tris[2::3] = first
+            return MuArray('i', 3, tris)
+        #avoid putting 0 at the end of the list (Blender doesn't
+        #like that): rotate those triangles to t0, t2, t1 instead. The
+        #columns are blended with a 0/1 mask of the rows starting with 0
+        #(t0 is 0 in those rows).
+        second = tris[1::3]
+        third = tris[2::3]
+        zero = array('i', map(not_, first))
+        tris[0::3] = array('i', map(sub, third, map(mul, third, zero)))
+        tris[1::3] = array('i', map(add, second,
+                                    map(mul, map(sub, third, second), zero)))
+        tris[2::3] = array('i', map(add, first, map(mul, second, zero)))
+        return MuArray('i', 3, tris)
+
+    def read_bytes(self, size):
+        # copy so the data does not pin a memory mapped file
+        return bytes(self.file.read(size))
+
     def read_string(self):
         size = self.read_7int()
         data = self.file.read(size)
-        if len(data) < size:
-            raise EOFError
         if type(data) == type(""):
             return data
-        s = ""
-        for c in data:
-            s = s + chr(c)
-        return s
+        # bytes map straight to code points (latin-1). Names (objects,
+        # bones, curve paths, shader properties...) repeat a lot, so intern
+        # them to share the memory.
+        return sys.intern(str(data, "latin-1"))
 
     def write_byte(self, data):
         if not hasattr(data, "__len__"):
             data = (data,)
-        self.file.write(pack(("<%dB" % len(data)), *data))
+        self.file.write(mu_struct('B', len(data)).pack(*data))
 
     def write_int(self, data):
         if not hasattr(data, "__len__"):
             data = (data,)
-        self.file.write(pack(("<%di" % len(data)), *data))
+        self.file.write(mu_struct('i', len(data)).pack(*data))
 
     def write_7int(self, data):
-        def writeval(val):
+        if not hasattr(data, "__len__"):
+            data = (data,)
+        buf = bytearray()
+        for val in data:
             if val < 0:
                 val += 1 << 32
             val &= (1 << 32) - 1
             while val > 127:
-                self.write_byte((val & 127) + 128)
+                buf.append((val & 127) + 128)
                 val >>= 7
-            self.write_byte(val)
-        if not hasattr(data, "__len__"):
-            data = (data,)
-        for d in data:
-            writeval(d)
+            buf.append(val)
+        self.file.write(buf)
 
     def write_uint(self, data):
         if not hasattr(data, "__len__"):
             data = (data,)
-        self.file.write(pack(("<%dI" % len(data)), *data))
+        self.file.write(mu_struct('I', len(data)).pack(*data))
 
     def write_float(self, data):
         if not hasattr(data, "__len__"):
             data = (data,)
-        self.file.write(pack(("<%df" % len(data)), *data))
+        self.file.write(mu_struct('f', len(data)).pack(*data))
 
     def write_vector(self, v):
         #convert from Blender's RHS to Unity's LHS
@@ -1159,6 +1913,55 @@ class Mu:
         cb = tuple(map(lambda x: int(bound(0, x, 1) * 255), c))
         self.write_byte(cb)
 
+    def write_array(self, data):
+        if sys.byteorder != "little":
+            data = array(data.typecode, data)
+            data.byteswap()
+        self.file.write(data.tobytes())
+
+    def write_vectors(self, vectors):
+        data = array('f', mu_array('f', 3, vectors).data)
+        #convert from Blender's RHS to Unity's LHS
+        swap_yz(data, 3)
+        self.write_array(data)
+
+    def write_uvs(self, uvs):
+        self.write_array(mu_array('f', 2, uvs).data)
+
+    def write_tangents(self, tangents):
+        data = array('f', mu_array('f', 4, tangents).data)
+        swap_yz(data, 4)
+        negate_w(data, 4)
+        self.write_array(data)
+
+    def write_colors(self, colors):
+        if isinstance(colors, MuArray):
+            colors = colors.data
+        else:
+            colors = chain.from_iterable(colors)
+        cb = array('B', map(lambda x: int(bound(0, x, 1) * 255), colors))
+        self.write_array(cb)
+
+    def write_bone_weights(self, indices, weights):
+        indices = mu_array('i', 4, indices).data
+        weights = mu_array('f', 4, weights).data
+        # the index/weight pairs are interleaved: reinterpret the weights
+        # as ints so the two can be merged into one int array
+        data = array('i', (0,)) * (len(indices) * 2)
+        data[0::2] = indices
+        data[1::2] = reinterpret('i', weights)
+        self.write_array(data)
+
+    def write_bind_poses(self, poses):
+        self.write_array(mu_array('f', 16, poses).data)
+
+    def write_triangles(self, tris):
+        data = array('i', mu_array('i', 3, tris).data)
+        #reverse the triangle winding for Blender (because of the
+        # LHS/RHS swap)
+        swap_yz(data, 3)
+        self.write_array(data)
+
     def write_bytes(self, data, size=-1):
         if size == -1:
             size = len(data)
@@ -1174,39 +1977,510 @@ class Mu:
 
     def __init__(self, name = "mu"):
         self.name = name
-        pass
-    def read(self, filepath):
+        self.lazy = False
+    def open(self, filepath, use_mmap=False):
+        if is_packed(filepath):
+            # decompressed into memory and parsed from there
+            data = self.__dict__.get("packed_data")
+            if data is None:
+                data = read_file(filepath)
+            return MuBytes(data)
+        if use_mmap:
+            return MuMap(filepath)
+        return MuFile(open(filepath, "rb"))
+    def defer(self, thing, offset, read):
+        """Record data skipped by a lazy read for decoding on first access.
+
+        offset is the start of the skipped data and the file is expected to
+        be positioned just past the data. read is called with self (with
+        the file positioned at offset) to decode the data.
+        """
+        size = self.file.tell() - offset
+        thing._lazy = self, offset, size, read
+    def read_deferred(self, offset, read):
+        """Decode data skipped by a lazy read.
+
+        The file is reopened (and closed again) for the purpose, so it must
+        not have changed since it was read.
+        """
+        prev_file = self.__dict__.get("file")
+        prev_lazy = self.lazy
+        self.file = self.open(self.filepath, self.use_mmap)
+        self.lazy = False
+        try:
+            self.file.seek(offset)
+            return read(self)
+        finally:
+            self.file.close()
+            if prev_file is None:
+                del self.file
+            else:
+                self.file = prev_file
+            self.lazy = prev_lazy
+    def read_indexed(self, filepath, offset, read, index, use_mmap):
+        if not index:
+            index = mu_index(filepath)
+        self.filepath = filepath
+        self.use_mmap = use_mmap
+        self.lazy = False
+        self.version = index.version
+        self.name = index.name
+        self.index = index
+        return self.read_deferred(offset, read)
+    def find_component(self, index, path, types):
+        for component in index.objects[path]["components"]:
+            if component["type"] in types:
+                return component
+        return None
+    # Read one object (and its children) by path, using the index
+    def read_object(self, filepath, path, index=None, use_mmap=False):
+        if not index:
+            index = mu_index(filepath)
+        if not index:
+            return None
+        offset = index.objects[path]["transform"]
         self.materials = []
         self.textures = []
-        self.file = open(filepath, "rb")
-        self.magic, self.version = self.read_int(2)
-        if (self.magic != MuEnum.MODEL_BINARY or self.version < 0
-            or self.version > MuEnum.FILE_VERSION):
+        read = lambda mu: MuObject().read(mu)
+        return self.read_indexed(filepath, offset, read, index, use_mmap)
+    # Read the collider of one object by path, using the index
+    def read_collider(self, filepath, path, index=None, use_mmap=False):
+        if not index:
+            index = mu_index(filepath)
+        if not index:
             return None
-        self.name = self.read_string()
-        #print("version: %d '%s'" % (self.version, self.name))
-        self.obj = MuObject().read(self)
-        #self.read_materials()
-        #self.read_textures()
-        del self.file
+        component = self.find_component(index, path, collider_types)
+        if not component:
+            return None
+        read = lambda mu: MuCollider(component["type"]).read(mu)
+        return self.read_indexed(filepath, component["offset"], read, index,
+                                 use_mmap)
+    # Read one animation clip by object path and clip name, using the index
+    def read_clip(self, filepath, path, name, index=None, use_mmap=False):
+        if not index:
+            index = mu_index(filepath)
+        if not index:
+            return None
+        component = self.find_component(index, path, [MuEnum.ET_ANIMATION])
+        if not component or name not in component["clips"]:
+            return None
+        read = lambda mu: MuClip().read(mu)
+        return self.read_indexed(filepath, component["clips"][name], read,
+                                 index, use_mmap)
+    def probe(self, filepath, index=None, use_mmap=False):
+        """Summarize a .mu file without decoding meshes or animations.
+
+        Uses the file's index (see MuIndex) and the material and texture
+        tables. Returns a dict with the version, model name, material
+        (name, shader) pairs, texture names, and for each object path,
+        the vertex and triangle counts of its meshes, the entry type names
+        of its colliders and the names of its animation clips. Returns
+        None if the file is not a .mu file.
+        """
+        if not index:
+            index = mu_index(filepath)
+        if not index:
+            return None
+        self.read_tables(filepath, index, use_mmap)
+        entry_names = {v: k for k, v in MuEnum.ENTRY_TYPES.items()}
+        objects = {}
+        for path, entry in index.objects.items():
+            summary = objects[path] = {
+                "vertices": 0,
+                "triangles": 0,
+                "colliders": [],
+                "clips": [],
+            }
+            for component in entry["components"]:
+                if "vertices" in component:
+                    summary["vertices"] += component["vertices"]
+                    summary["triangles"] += component["triangles"]
+                if component["type"] in collider_types:
+                    summary["colliders"].append(entry_names[component["type"]])
+                if "clips" in component:
+                    summary["clips"].extend(component["clips"])
+        return {
+            "version": index.version,
+            "name": index.name,
+            "materials": [(m.name, m.shaderName) for m in self.materials],
+            "textures": [t.name for t in self.textures],
+            "objects": objects,
+        }
+    # Read only the material and texture tables, using the index
+    def read_tables(self, filepath, index=None, use_mmap=False):
+        if not index:
+            index = mu_index(filepath)
+        if not index:
+            return None
+        def read_materials(mu):
+            for i in range(mu.read_int()):
+                mu.materials.append(MuMaterial().read(mu))
+        def read_textures(mu):
+            for i in range(mu.read_int()):
+                mu.textures.append(MuTexture().read(mu))
+        self.materials = []
+        self.textures = []
+        if is_packed(filepath):
+            # decompress once for both tables, not once per table
+            self.packed_data = read_file(filepath)
+        try:
+            if index.materials is not None:
+                self.read_indexed(filepath, index.materials, read_materials,
+                                  index, use_mmap)
+            if index.textures is not None:
+                self.read_indexed(filepath, index.textures, read_textures,
+                                  index, use_mmap)
+        finally:
+            self.__dict__.pop("packed_data", None)
+        return self
+    def read(self, filepath, use_mmap=False, lazy=False):
+        # use_mmap: parse in place from a memory mapped file
+        # lazy: skip mesh data and animation keys until first accessed
+        # compressed and archived files are read into memory, never lazily
+        if is_packed(filepath):
+            lazy = False
+        # non-lazy reads are served from and added to the cache, if enabled
+        if mu_cache and not lazy:
+            cached = mu_cache.get(filepath)
+            if cached:
+                self.__dict__.update(cached)
+                self.filepath = filepath
+                self.use_mmap = use_mmap
+                return self
+        self.filepath = filepath
+        self.use_mmap = use_mmap
+        self.lazy = lazy
+        if not self.read_model(self.open(filepath, use_mmap)):
+            return None
+        if mu_cache and not lazy:
+            mu_cache.put(filepath, self)
+        return self
+    def load(self, data, filepath=""):
+        """Read a .mu file already loaded into memory (bytes-like data).
+
+        filepath is for reference only. Lazy reading is not available.
+        Returns None if data is not a recognized .mu file.
+        """
+        self.filepath = filepath
+        self.use_mmap = False
+        self.lazy = False
+        if not self.read_model(MuBytes(data)):
+            return None
+        return self
+    def read_model(self, file):
+        self.materials = []
+        self.textures = []
+        self.file = file
+        try:
+            self.magic, self.version = self.read_int(2)
+            if (self.magic != MuEnum.MODEL_BINARY or self.version < 0
+                or self.version > MuEnum.FILE_VERSION):
+                return None
+            self.name = self.read_string()
+            #print("version: %d '%s'" % (self.version, self.name))
+            self.obj = MuObject().read(self)
+            #self.read_materials()
+            #self.read_textures()
+        finally:
+            self.file.close()
+            del self.file
         return self
+    async def read_async(self, filepath):
+        """Read a .mu file without blocking the event loop on the I/O.
+
+        The file's bytes are read in the event loop's default executor, then
+        parsed in the loop's thread. Lazy reading is not available.
+        """
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, read_file, filepath)
+        return self.load(data, filepath)
+    def parse(self, filepath, use_mmap=False, chunk_size=4096):
+        """Generate MuEvent events for a .mu file without building the tree.
+
+        Mesh streams are decoded at most chunk_size vertices (or triangles)
+        at a time, so memory use does not depend on the size of the model.
+        The file is closed when the generator is exhausted or closed, so
+        stopping early is cheap. Nothing is generated if the file is not
+        a recognized .mu file.
+        """
+        self.file = self.open(filepath, use_mmap)
+        self.lazy = False
+        try:
+            self.magic, self.version = self.read_int(2)
+            if (self.magic != MuEnum.MODEL_BINARY or self.version < 0
+                or self.version > MuEnum.FILE_VERSION):
+                return
+            self.name = self.read_string()
+            transforms = [MuTransform().read(self)]
+            yield MuEvent.TRANSFORM_START, transforms[0], 0
+            while transforms:
+                try:
+                    entry_type = self.read_int()
+                except EOFError:
+                    break
+                if entry_type == MuEnum.ET_CHILD_TRANSFORM_START:
+                    transform = MuTransform().read(self)
+                    transforms.append(transform)
+                    yield (MuEvent.TRANSFORM_START, transform,
+                           len(transforms) - 1)
+                elif entry_type == MuEnum.ET_CHILD_TRANSFORM_END:
+                    transform = transforms.pop()
+                    yield MuEvent.TRANSFORM_END, transform, len(transforms)
+                else:
+                    for event in self.parse_entry(entry_type, chunk_size):
+                        yield event
+            # the root object has no end marker
+            while transforms:
+                transform = transforms.pop()
+                yield MuEvent.TRANSFORM_END, transform, len(transforms)
+        finally:
+            self.file.close()
+            del self.file
+    def parse_entry(self, entry_type, chunk_size):
+        component = None
+        mesh = False
+        if entry_type == MuEnum.ET_TAG_AND_LAYER:
+            component = MuTagLayer().read(self)
+        elif entry_type in [MuEnum.ET_MESH_COLLIDER,
+                            MuEnum.ET_MESH_COLLIDER2]:
+            component = MuCollider(entry_type).read_header(self)
+            mesh = True
+        elif entry_type in collider_types:
+            component = MuCollider(entry_type).read(self)
+        elif entry_type == MuEnum.ET_MESH_FILTER:
+            mesh = True
+        elif entry_type == MuEnum.ET_MESH_RENDERER:
+            component = MuRenderer().read(self)
+        elif entry_type == MuEnum.ET_SKINNED_MESH_RENDERER:
+            component = MuSkinnedMeshRenderer().read_header(self)
+            mesh = True
+        elif entry_type == MuEnum.ET_ANIMATION:
+            component = MuAnimation().read(self)
+        elif entry_type == MuEnum.ET_CAMERA:
+            component = MuCamera().read(self)
+        elif entry_type == MuEnum.ET_PARTICLES:
+            component = MuParticles().read(self)
+        elif entry_type == MuEnum.ET_LIGHT:
+            component = MuLight().read(self)
+        elif entry_type == MuEnum.ET_MATERIALS:
+            mat_count = self.read_int()
+            for i in range(mat_count):
+                yield MuEvent.MATERIAL, i, MuMaterial().read(self)
+            return
+        elif entry_type == MuEnum.ET_TEXTURES:
+            tex_count = self.read_int()
+            for i in range(tex_count):
+                yield MuEvent.TEXTURE, i, MuTexture().read(self)
+            return
+        else:
+            return
+        yield MuEvent.COMPONENT, entry_type, component
+        if mesh:
+            for event in self.parse_mesh(chunk_size):
+                yield event
+    def parse_mesh(self, chunk_size):
+        start = self.read_int()
+        if start != MuEnum.ET_MESH_START:
+            raise ValueError("MuMesh %x %d" % (self.file.tell(), start))
+        num_verts, submesh_count = self.read_int(2)
+        yield MuEvent.MESH_START, num_verts, submesh_count
+        while True:
+            type = self.read_int()
+            if type == MuEnum.ET_MESH_END:
+                break
+            elif type in MuMesh.streams:
+                read = MuMesh.streams[type][1]
+                for first in range(0, num_verts, chunk_size):
+                    count = min(chunk_size, num_verts - first)
+                    yield MuEvent.MESH_STREAM, type, first, read(self, count)
+            elif type == MuEnum.ET_MESH_BIND_POSES:
+                num_poses = self.read_int()
+                poses = self.read_bind_poses(num_poses)
+                yield MuEvent.MESH_STREAM, type, 0, poses
+            elif type == MuEnum.ET_MESH_TRIANGLES:
+                num_tris = int(self.read_int() / 3)
+                for first in range(0, num_tris, chunk_size):
+                    count = min(chunk_size, num_tris - first)
+                    tris = self.read_triangles(count)
+                    yield MuEvent.MESH_STREAM, type, first, tris
+            else:
+                raise ValueError("MuMesh %x %d" % (self.file.tell(), type))
+        yield (MuEvent.MESH_END,)
     def write(self, filepath):
+        """Write the model to a .mu file.
+
+        The model is serialized into memory and written out with a single
+        write, so the file is not touched if serialization fails.
+        """
+        self.file = MuBuffer()
+        try:
+            self.write_int(MuEnum.MODEL_BINARY)
+            self.write_int(MuEnum.FILE_VERSION)
+            self.write_string(self.name)
+            self.obj.write(self)
+            if len(self.materials):
+                self.write_int(MuEnum.ET_MATERIALS)
+                self.write_int(len(self.materials))
+                for mat in self.materials:
+                    mat.write(self)
+            if len(self.textures):
+                self.write_int(MuEnum.ET_TEXTURES)
+                self.write_int(len(self.textures))
+                for tex in self.textures:
+                    tex.write(self)
+            with open(filepath, "wb") as file:
+                file.write(self.file.data)
+        finally:
+            del self.file
+
+# Write a .mu file one object at a time (begin_object, add_component,
+# end_object), so only the object being added need be in memory.
+class MuWriter:
+    def __init__(self, filepath, name="mu"):
+        self.filepath = filepath
+        self.mu = Mu(name)
+        self.mu.file = MuBuffer()
+        self.mu.materials = []
+        self.mu.textures = []
         self.file = open(filepath, "wb")
-        self.write_int(MuEnum.MODEL_BINARY)
-        self.write_int(MuEnum.FILE_VERSION)
-        self.write_string(self.name)
-        self.obj.write(self)
-        if len(self.materials):
-            self.write_int(MuEnum.ET_MATERIALS)
-            self.write_int(len(self.materials))
-            for mat in self.materials:
-                mat.write(self)
-        if len(self.textures):
-            self.write_int(MuEnum.ET_TEXTURES)
-            self.write_int(len(self.textures))
-            for tex in self.textures:
-                tex.write(self)
-        del self.file
+        self.depth = 0
+        self.root_done = False
+        try:
+            self.mu.write_int(MuEnum.MODEL_BINARY)
+            self.mu.write_int(MuEnum.FILE_VERSION)
+            self.mu.write_string(name)
+            self.flush()
+        except BaseException:
+            self.abort()
+            raise
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+    def abort(self):
+        # a partly written file is of no use to anything, so don't leave it
+        if not self.file.closed:
+            self.file.close()
+            try:
+                os.remove(self.filepath)
+            except OSError:
+                pass
+    def flush(self):
+        try:
+            self.file.write(self.mu.file.data)
+        except BaseException:
+            self.abort()
+            raise
+        self.mu.file = MuBuffer()
+    def begin_object(self, transform, tag_and_layer=None):
+        if self.root_done:
+            raise ValueError("MuWriter: only one root object")
+        if self.depth:
+            self.mu.write_int(MuEnum.ET_CHILD_TRANSFORM_START)
+        self.depth += 1
+        try:
+            transform.write(self.mu)
+            if tag_and_layer:
+                tag_and_layer.write(self.mu)
+        except BaseException:
+            self.abort()
+            raise
+        self.flush()
+    def add_component(self, component):
+        if not self.depth:
+            raise ValueError("MuWriter: component outside of an object")
+        try:
+            if isinstance(component, MuMesh):
+                self.mu.write_int(MuEnum.ET_MESH_FILTER)
+            component.write(self.mu)
+        except BaseException:
+            self.abort()
+            raise
+        self.flush()
+    def end_object(self):
+        if not self.depth:
+            raise ValueError("MuWriter: end_object without begin_object")
+        self.depth -= 1
+        if self.depth:
+            self.mu.write_int(MuEnum.ET_CHILD_TRANSFORM_END)
+            self.flush()
+        else:
+            self.root_done = True
+    def add_material(self, material):
+        self.mu.materials.append(material)
+    def add_texture(self, texture):
+        self.mu.textures.append(texture)
+    def close(self):
+        try:
+            if self.depth or not self.root_done:
+                raise ValueError("MuWriter: root object not complete")
+            mu = self.mu
+            if len(mu.materials):
+                mu.write_int(MuEnum.ET_MATERIALS)
+                mu.write_int(len(mu.materials))
+                for mat in mu.materials:
+                    mat.write(mu)
+            if len(mu.textures):
+                mu.write_int(MuEnum.ET_TEXTURES)
+                mu.write_int(len(mu.textures))
+                for tex in mu.textures:
+                    tex.write(mu)
+            self.flush()
+        except BaseException:
+            self.abort()
+            raise
+        self.file.close()
+
+def read_one(filepath):
+    mu = Mu()
+    try:
+        if not mu.read(filepath, use_mmap=True):
+            return None
+    except (OSError, EOFError, ValueError):
+        return None
+    return mu
+
+def read_many(paths, workers=None, depth=None):
+    """Generate the Mu for each of paths (None if unreadable), in order."""
+    # At most depth files are decoded ahead of the consumer. The workers
+    # may import the calling script, so guard it with __name__ == "__main__"
+    if not workers:
+        workers = os.cpu_count() or 1
+    if not depth:
+        depth = 2 * workers
+    paths = iter(paths)
+    pending = deque()
+    executor = ProcessPoolExecutor(workers)
+    def read_ahead():
+        for path in islice(paths, depth - len(pending)):
+            pending.append(executor.submit(read_one, path))
+    try:
+        read_ahead()
+        while pending:
+            future = pending.popleft()
+            # keep the workers busy while the caller handles this model
+            read_ahead()
+            yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+def read_many_async(paths, workers=4, depth=8):
+    """Read .mu files asynchronously, prefetching them (see prefetch).
+
+    Generates (path, Mu) pairs in the order of paths, with None for files
+    that are not valid .mu files. Errors reading the files propagate.
+    """
+    def load(path, data):
+        try:
+            return Mu().load(data, path)
+        except (EOFError, ValueError):
+            return None
+    return prefetch(paths, load, workers, depth)
 
 if __name__ == "__main__":
     mu = Mu()
@@ -0,0 +1,394 @@
+# vim:ts=4:et
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Benchmark for the .mu format layer: generates a synthetic model from the
+# given parameters, then times reading and writing it (in whole and per
+# section) and reports the results as JSON.
+
+import sys
+import os
+import getopt
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+from mu import Mu, MuEnum, MuIndex, MuBuffer, MuArray
+from mu import MuObject, MuTransform, MuTagLayer, MuMesh, MuRenderer
+from mu import MuSkinnedMeshRenderer, MuMaterial, MuTexture, MuMatTex
+from mu import MuAnimation, MuClip, MuCurve
+
+all_attributes = ["uvs", "uv2s", "normals", "tangents", "colors"]
+
+default_params = {
+    "verts": 10000,         # vertices per mesh
+    "attributes": all_attributes,
+    "submeshes": 1,
+    "depth": 2,             # levels of children below the root
+    "width": 3,             # children per object
+    "clips": 2,
+    "curves": 10,           # per clip
+    "keys": 100,            # per curve
+    "skin": False,          # give the root a skinned mesh
+    "repeat": 3,            # timings are the best of repeat runs
+    "seed": 0,
+}
+
+section_names = {v: k for k, v in MuEnum.ENTRY_TYPES.items()}
+
+def random_array(typecode, count, lo, hi):
+    if typecode in 'fd':
+        return array(typecode, [random.uniform(lo, hi) for i in range(count)])
+    return array(typecode, [random.randrange(lo, hi) for i in range(count)])
+
+def make_mesh(params):
+    num_verts = params["verts"]
+    mesh = MuMesh()
+    mesh.verts = MuArray('f', 3, random_array('f', num_verts * 3, -5, 5))
+    if "uvs" in params["attributes"]:
+        mesh.uvs = MuArray('f', 2, random_array('f', num_verts * 2, 0, 1))
+    if "uv2s" in params["attributes"]:
+        mesh.uv2s = MuArray('f', 2, random_array('f', num_verts * 2, 0, 1))
+    if "normals" in params["attributes"]:
+        mesh.normals = MuArray('f', 3, random_array('f', num_verts * 3, -1, 1))
+    if "tangents" in params["attributes"]:
+        mesh.tangents = MuArray('f', 4,
+                                random_array('f', num_verts * 4, -1, 1))
+    if "colors" in params["attributes"]:
+        mesh.colors = MuArray('d', 4, random_array('d', num_verts * 4, 0, 1))
+    for i in range(params["submeshes"]):
+        num_tris = num_verts // params["submeshes"]
+        tris = random_array('i', num_tris * 3, 0, num_verts)
+        mesh.submeshes.append(MuArray('i', 3, tris))
+    return mesh
+
+def make_skin(params, bones):
+    skin = MuSkinnedMeshRenderer()
+    skin.materials = [0]
+    skin.center = (0.0, 0.0, 0.0)
+    skin.size = (1.0, 1.0, 1.0)
+    skin.quality = 4
+    skin.updateWhenOffscreen = 0
+    skin.bones = bones
+    skin.mesh = make_mesh(params)
+    num_verts = params["verts"]
+    indices = random_array('i', num_verts * 4, 0, len(bones))
+    weights = random_array('f', num_verts * 4, 0, 1)
+    skin.mesh.boneIndices = MuArray('i', 4, indices)
+    skin.mesh.boneWeights = MuArray('f', 4, weights)
+    poses = random_array('f', len(bones) * 16, -1, 1)
+    skin.mesh.bindPoses = MuArray('f', 16, poses)
+    return skin
+
+def make_animation(params):
+    anim = MuAnimation()
+    anim.autoPlay = 0
+    for c in range(params["clips"]):
+        clip = MuClip()
+        clip.name = "clip%d" % c
+        clip.lbCenter = (0.0, 0.0, 0.0)
+        clip.lbSize = (1.0, 1.0, 1.0)
+        clip.wrapMode = 0
+        num_keys = params["keys"]
+        for i in range(params["curves"]):
+            curve = MuCurve()
+            curve.path = ""
+            curve.property = "m_LocalPosition.x"
+            curve.type = 0
+            curve.wrapMode = (0, 0)
+            curve.times = array('f', [k / 30 for k in range(num_keys)])
+            curve.values = random_array('f', num_keys, -1, 1)
+            curve.inTangents = random_array('f', num_keys, -1, 1)
+            curve.outTangents = random_array('f', num_keys, -1, 1)
+            curve.tangentModes = array('i', [0]) * num_keys
+            clip.curves.append(curve)
+        anim.clips.append(clip)
+    anim.clip = anim.clips[0].name if anim.clips else ""
+    return anim
+
+def make_object(params, name, depth, names):
+    obj = MuObject()
+    obj.transform = MuTransform()
+    obj.transform.name = name
+    obj.transform.localPosition = (0.0, 0.0, 0.0)
+    obj.transform.localRotation = (1.0, 0.0, 0.0, 0.0)
+    obj.transform.localScale = (1.0, 1.0, 1.0)
+    obj.tag_and_layer = MuTagLayer()
+    obj.tag_and_layer.tag = "Untagged"
+    obj.tag_and_layer.layer = 0
+    obj.shared_mesh = make_mesh(params)
+    obj.renderer = MuRenderer()
+    obj.renderer.materials = [0]
+    names.append(name)
+    if depth < params["depth"]:
+        for i in range(params["width"]):
+            child = "%s_%d" % (name, i)
+            obj.children.append(make_object(params, child, depth + 1, names))
+    return obj
+
+def generate(params):
+    """Build a synthetic model from params (see default_params)."""
+    random.seed(params["seed"])
+    mu = Mu("bench")
+    names = []
+    mu.obj = make_object(params, "root", 0, names)
+    if params["skin"]:
+        mu.obj.skinned_mesh_renderer = make_skin(params, names)
+    if params["clips"]:
+        mu.obj.animation = make_animation(params)
+    mat = MuMaterial()
+    mat.name = "mat"
+    mat.shaderName = "KSP/Diffuse"
+    mat.textureProperties["_MainTex"] = MuMatTex()
+    mat.textureProperties["_MainTex"].index = 0
+    mat.textureProperties["_MainTex"].scale = (1.0, 1.0)
+    mat.textureProperties["_MainTex"].offset = (0.0, 0.0)
+    mu.materials = [mat]
+    tex = MuTexture()
+    tex.name = "tex"
+    tex.type = 0
+    mu.textures = [tex]
+    return mu
+
+def best_time(repeat, func):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def rates(seconds, size, verts):
+    return {
+        "seconds": seconds,
+        "MB/s": size / seconds / 1e6 if seconds else None,
+        "verts/s": verts / seconds if seconds else None,
+    }
+
+def mesh_components(obj):
+    if hasattr(obj, "shared_mesh"):
+        yield obj.shared_mesh
+    for attr in ["skinned_mesh_renderer", "collider"]:
+        if hasattr(getattr(obj, attr, None), "mesh"):
+            yield getattr(obj, attr).mesh
+    for child in obj.children:
+        yield from mesh_components(child)
+
+def animation_components(obj):
+    if hasattr(obj, "animation"):
+        yield obj.animation
+    for child in obj.children:
+        yield from animation_components(child)
+
+# writers (and what they write) of the mesh sections
+section_writers = {
+    MuEnum.ET_MESH_VERTS: lambda mu, m: mu.write_vectors(m.verts),
+    MuEnum.ET_MESH_UV: lambda mu, m: mu.write_uvs(m.uvs),
+    MuEnum.ET_MESH_UV2: lambda mu, m: mu.write_uvs(m.uv2s),
+    MuEnum.ET_MESH_NORMALS: lambda mu, m: mu.write_vectors(m.normals),
+    MuEnum.ET_MESH_TANGENTS: lambda mu, m: mu.write_tangents(m.tangents),
+    MuEnum.ET_MESH_BONE_WEIGHTS:
+        lambda mu, m: mu.write_bone_weights(m.boneIndices, m.boneWeights),
+    MuEnum.ET_MESH_BIND_POSES: lambda mu, m: mu.write_bind_poses(m.bindPoses),
+    MuEnum.ET_MESH_VERTEX_COLORS: lambda mu, m: mu.write_colors(m.colors),
+    MuEnum.ET_MESH_TRIANGLES:
+        lambda mu, m: [mu.write_triangles(sm) for sm in m.submeshes],
+}
+
+# the model attribute whose presence means the section is written
+section_attributes = {
+    MuEnum.ET_MESH_VERTS: "verts",
+    MuEnum.ET_MESH_UV: "uvs",
+    MuEnum.ET_MESH_UV2: "uv2s",
+    MuEnum.ET_MESH_NORMALS: "normals",
+    MuEnum.ET_MESH_TANGENTS: "tangents",
+    MuEnum.ET_MESH_BONE_WEIGHTS: "boneWeights",
+    MuEnum.ET_MESH_BIND_POSES: "bindPoses",
+    MuEnum.ET_MESH_VERTEX_COLORS: "colors",
+    MuEnum.ET_MESH_TRIANGLES: "submeshes",
+}
+
+def bench_write_sections(mu, repeat):
+    meshes = list(mesh_components(mu.obj))
+    animations = list(animation_components(mu.obj))
+    sections = {}
+    writer = Mu()
+    for type, write in section_writers.items():
+        attr = section_attributes[type]
+        todo = [m for m in meshes if len(getattr(m, attr))]
+        if not todo:
+            continue
+        def write_section():
+            writer.file = MuBuffer()
+            for m in todo:
+                write(writer, m)
+        seconds = best_time(repeat, write_section)
+        verts = 0
+        if type != MuEnum.ET_MESH_BIND_POSES:
+            verts = sum(len(m.verts) for m in todo)
+        size = len(writer.file.data)
+        sections[section_names[type]] = rates(seconds, size, verts)
+    if animations:
+        def write_animations():
+            writer.file = MuBuffer()
+            for anim in animations:
+                for clip in anim.clips:
+                    clip.write(writer)
+        seconds = best_time(repeat, write_animations)
+        size = len(writer.file.data)
+        sections[section_names[MuEnum.ET_ANIMATION]] = rates(seconds, size, 0)
+    return sections
+
+def bench_read_sections(path, repeat):
+    index = MuIndex().build(path)
+    streams = {}
+    clips = []
+    for entry in index.objects.values():
+        for component in entry["components"]:
+            for type, offset in component.get("streams", []):
+                streams.setdefault(type, []).append((offset, component))
+            clips.extend(component.get("clips", {}).values())
+    reader = Mu()
+    reader.version = index.version
+    sections = {}
+    for type, todo in streams.items():
+        def read_section():
+            reader.file = reader.open(path)
+            try:
+                for offset, component in todo:
+                    reader.file.seek(offset)
+                    num_verts = component["vertices"]
+                    if type in MuMesh.streams:
+                        MuMesh.streams[type][1](reader, num_verts)
+                    elif type == MuEnum.ET_MESH_BIND_POSES:
+                        reader.read_bind_poses(reader.read_int())
+                    elif type == MuEnum.ET_MESH_TRIANGLES:
+                        reader.read_triangles(reader.read_int() // 3)
+            finally:
+                reader.file.close()
+        seconds = best_time(repeat, read_section)
+        verts = 0
+        if type != MuEnum.ET_MESH_BIND_POSES:
+            verts = sum(c["vertices"] for offset, c in todo)
+        size = section_size(type, todo)
+        sections[section_names[type]] = rates(seconds, size, verts)
+    if clips:
+        def read_clips():
+            reader.file = reader.open(path)
+            try:
+                for offset in clips:
+                    reader.file.seek(offset)
+                    MuClip().read(reader)
+            finally:
+                reader.file.close()
+        seconds = best_time(repeat, read_clips)
+        sections[section_names[MuEnum.ET_ANIMATION]] = {"seconds": seconds}
+    return sections
+
+def section_size(type, todo):
+    if type in MuMesh.stream_sizes:
+        per_vert = MuMesh.stream_sizes[type]
+        return sum(c["vertices"] * per_vert for offset, c in todo)
+    elif type == MuEnum.ET_MESH_TRIANGLES:
+        return sum(c["triangles"] * 12 for offset, c in todo)
+    return 0
+
+def bench(params):
+    mu = generate(params)
+    repeat = params["repeat"]
+    verts = sum(len(m.verts) for m in mesh_components(mu.obj))
+    fd, path = tempfile.mkstemp(suffix=".mu")
+    os.close(fd)
+    try:
+        mu.write(path)
+        size = os.stat(path).st_size
+        results = {
+            "params": params,
+            "file_size": size,
+            "vertices": verts,
+            "write": rates(best_time(repeat, lambda: mu.write(path)),
+                           size, verts),
+            "read": rates(best_time(repeat, lambda: Mu().read(path)),
+                          size, verts),
+            "read_mmap": rates(best_time(repeat,
+                                         lambda: Mu().read(path, True)),
+                               size, verts),
+            "read_lazy": {"seconds": best_time(repeat,
+                                     lambda: Mu().read(path, lazy=True))},
+            "write_sections": bench_write_sections(mu, repeat),
+            "read_sections": bench_read_sections(path, repeat),
+            "peak_memory": {
+                "write": peak_memory(lambda: mu.write(path)),
+                "read": peak_memory(lambda: Mu().read(path)),
+            },
+        }
+    finally:
+        os.remove(path)
+    return results
+
+shortopts = 'o:'
+longopts = [
+    'verts=',
+    'attributes=',
+    'submeshes=',
+    'depth=',
+    'width=',
+    'clips=',
+    'curves=',
+    'keys=',
+    'skin',
+    'repeat=',
+    'seed=',
+    'output=',
+]
+
+def main():
+    options, args = getopt.getopt(sys.argv[1:], shortopts, longopts)
+    params = dict(default_params)
+    output = None
+    for opt, arg in options:
+        if opt in ("-o", "--output"):
+            output = arg
+        elif opt == "--attributes":
+            params["attributes"] = [a for a in arg.split(",") if a]
+        elif opt == "--skin":
+            params["skin"] = True
+        else:
+            params[opt[2:]] = int(arg)
+    text = json.dumps(bench(params), indent=4)
+    if output:
+        with open(output, "wt") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
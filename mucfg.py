@@ -46,6 +46,8 @@ def add_thing(thing, mu, node, exclude, add_funcs):
         if a[0] == "_" or a in ["read", "write", "components"] or a in exclude:
             continue
         attr = getattr(thing, a)
+        if callable(attr):
+            continue
         n = attr.__class__.__name__
         if type(attr) is dict:
             if attr:
@@ -83,17 +85,16 @@ def add_materials(mu, cfg):
         mat_node = materials_node.AddNewNode("Material")
         add_thing(mat[1], mu, mat_node, [], mat_add_funcs);
 
-def add_bone_weight(name, mu, weight, node):
-    weights = ""
+def add_bone_weight(name, mu, indices, weights, node):
+    iw = ""
     for i in range(4):
-        iw = weight.indices[i], weight.weights[i]
-        weights = weights + (", %d, %.9g" % iw)
-    node.AddValue("weights", weights[2:])
+        iw = iw + (", %d, %.9g" % (indices[i], weights[i]))
+    node.AddValue("weights", iw[2:])
 
-def add_bone_weights(name, mu, weights, node):
+def add_bone_weights(name, mu, mesh, node):
     weights_node = node.AddNewNode(name)
-    for weight in weights:
-        add_bone_weight(name, mu, weight, weights_node)
+    for indices, weights in zip(mesh.boneIndices, mesh.boneWeights):
+        add_bone_weight(name, mu, indices, weights, weights_node)
 
 def add_bind_poses(name, mu, poses, node):
     if poses:
@@ -144,13 +145,17 @@ mesh_add_funcs = {
     "verts": add_verts,
     "tangents": add_tangents,
     "submeshes": add_submeshes,
-    "boneWeights": add_bone_weights,
     "bindPoses": add_bind_poses,
 }
 
 def add_mesh(name, mu, mesh, node):
     mesh_node = node.AddNewNode("Mesh")
-    add_thing(mesh, mu, mesh_node, [], mesh_add_funcs)
+    # the bone indices and weights are written together as pairs
+    add_funcs = dict(mesh_add_funcs)
+    add_funcs["boneWeights"] = lambda name, mu, weights, node: (
+        add_bone_weights(name, mu, mesh, node))
+    add_thing(mesh, mu, mesh_node, ["boneIndices", "stream_sizes", "streams"],
+              add_funcs)
 
 def add_bones(name, mu, bones, node):
     for b in bones:
@@ -237,12 +242,16 @@ def add_keys(name, mu, keys, node):
 
 curve_add_funcs = {
     "tuple": add_vector,
-    "keys": add_keys,
 }
 
 def add_curve(name, mu, curve, node):
     curve_node = node.AddNewNode("Curve")
-    add_thing(curve, mu, curve_node, [], curve_add_funcs)
+    # the keys are written individually rather than as packed columns
+    add_keys("keys", mu, curve.keys, curve_node)
+    add_thing(curve, mu, curve_node, ["keys", "times", "values",
+                                      "inTangents", "outTangents",
+                                      "tangentModes"],
+              curve_add_funcs)
 
 def add_curves(name, mu, curves, node):
     curves_node = node.AddNewNode ("Curves")
@@ -94,6 +94,13 @@ class IOObjectMu_AddonPreferences(AddonPreferences):
         description="Path to KSP GameData tree",
         subtype='DIR_PATH')
 
+    TextureCache: StringProperty(
+        name="MBM Cache Path",
+        description="Directory for caching imported .mbm textures as .png "
+                    "files. When not set, the textures are packed into "
+                    "the blend file",
+        subtype='DIR_PATH')
+
     AutohideColliders: BoolProperty(
         name="Autohide Mesh Colliders",
         description="Automatically hide new mesh colliders",
@@ -106,6 +113,7 @@ class IOObjectMu_AddonPreferences(AddonPreferences):
         box.prop(self, "AutohideColliders")
         box.label(text="KSP:")
         box.prop(self, "GameData")
+        box.prop(self, "TextureCache")
         box.label(text="Shaders:")
         box.operator(KSPMU_OT_InstallShaders.bl_idname,
                      text=KSPMU_OT_InstallShaders.bl_label);